@@ -1,90 +1,65 @@
+import asyncio
 import json
-import requests
-from typing import List, Dict
-import time
+import os
 import sys
-from datetime import datetime
+from typing import Dict, Iterable, Iterator
 
-def load_json_file(file_path: str) -> List[Dict]:
-    """Load and parse JSON data from file."""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import iter_records
+from uploader import Uploader, chunked, count_bulk_results, with_stable_ids
+
+BATCH_SIZE = 100
+CHECKPOINT_PATH = "./data/checkpoints/add_all_posts.checkpoint"
+
+def load_json_file(file_path: str) -> Iterator[Dict]:
+    """Stream posts one at a time from a JSON array or JSONL file."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return json.load(file)
+        yield from iter_records(file_path)
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON file: {e}")
-        return []
     except FileNotFoundError:
         print(f"File not found: {file_path}")
-        return []
     except Exception as e:
         print(f"Error reading file: {str(e)}")
-        return []
 
-def upload_posts(posts: List[Dict], base_url: str = "http://localhost:8000") -> None:
-    """Upload posts to the database using the FastAPI endpoint."""
-    successful = 0
-    failed = 0
-    total = len(posts)
+def to_comments(comments: Iterable[Dict]) -> Iterator[Dict]:
+    """Shape comments as bulk items; a comment without text is skipped, not its post."""
+    for comment in comments:
+        content = comment.get("content", comment.get("body"))
+        if content is None:
+            print("Missing key in comment: 'content'")
+            continue
+        yield {"content": content, "author": comment.get("author", "Anonymous")}
 
-    print(f"Starting upload of {total} posts...")
-
-    for index, post in enumerate(posts, 1):
+def to_payload(posts: Iterable[Dict]) -> Iterator[Dict]:
+    """Shape scraped posts as /upload_posts/bulk items, skipping incomplete ones."""
+    for post in posts:
         try:
-            post_data = {
+            yield {
                 "title": post["title"],
                 "content": post["content"],
                 "author": post.get("author", "Anonymous"),
                 "category": post.get("category", "Carrier Comparison"),
-                "upvotes": post.get("upvotes", 0),
-                "created_at": post.get("created_utc", datetime.utcnow().isoformat())
+                "comments": list(to_comments(post.get("comments") or [])),
             }
-
-            response = requests.post(f"{base_url}/upload_post/", json=post_data)
-
-            if response.status_code == 201:
-                print(f"[{index}/{total}] Successfully uploaded post: {post['title'][:50]}...")
-                successful += 1
-
-                post_id = response.json()["id"]
-                if post.get("comments"):
-                    for comment in post["comments"]:
-                        comment_data = {
-                            "content": comment["body"],
-                            "author": comment.get("author", "Anonymous"),
-                            "created_at": comment.get("created_utc", datetime.utcnow().isoformat())
-                        }
-                        comment_response = requests.post(
-                            f"{base_url}/upload_comment/{post_id}",
-                            json=comment_data
-                        )
-                        if comment_response.status_code != 201:
-                            print(f"Failed to upload comment for post {post_id}: {comment_response.text}")
-            else:
-                print(f"[{index}/{total}] Failed to upload post: {post['title'][:50]}... Status: {response.status_code}")
-                print(f"Response: {response.text}")
-                failed += 1
-
-            time.sleep(0.5)
-
-        except requests.exceptions.ConnectionError:
-            print("Error: Could not connect to the server. Make sure the FastAPI server is running.")
-            sys.exit(1)
         except KeyError as e:
             print(f"Missing key in post: {e}")
-            failed += 1
-        except Exception as e:
-            print(f"Error uploading post: {str(e)}")
-            failed += 1
+
+def upload_posts(posts: Iterable[Dict], base_url: str = "http://localhost:8000") -> dict:
+    """Upload posts with their comments through the bulk FastAPI endpoint."""
+    print("Starting upload of posts...")
+    jobs = (
+        ("POST", "/upload_posts/bulk", batch, len(batch))
+        for batch in chunked(with_stable_ids(to_payload(posts)), BATCH_SIZE)
+    )
+    uploader = Uploader(base_url, checkpoint_path=CHECKPOINT_PATH)
+    return asyncio.run(uploader.run(jobs, count_bulk_results))
 
 def main():
     file_path = "./Posts/final_posts.json"
 
-    posts = load_json_file(file_path)
-
-    if posts:
-        upload_posts(posts)
-    else:
-        print("No valid posts found in the JSON file")
+    upload_posts(load_json_file(file_path))
 
 if __name__ == "__main__":
     main()
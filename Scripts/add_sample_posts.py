@@ -1,8 +1,14 @@
-import requests
-
-import json
-# logger 
+import asyncio
+# logger
 import logging
+import os
+import sys
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import iter_records
+from uploader import Uploader, chunked, count_bulk_results, with_stable_ids
 
 logging.basicConfig(level=logging.INFO)
 
@@ -10,43 +16,35 @@ logger = logging.getLogger(__name__)
 
 no_of_posts = 4
 no_of_comments = 4
+BATCH_SIZE = 50
+CHECKPOINT_PATH = "./data/checkpoints/add_sample_posts.checkpoint"
 
 def add_sample_posts():
     HOST = "https://shiptalkorchestroaibackend-1.onrender.com"
     # HOST = "http://127.0.0.1:8000"
-    endpoint = "/upload_post/"
-
-    with open("./Posts/posts_data.json") as f:
-        posts = json.load(f)
-    i = 0
-    for post in posts[no_of_posts:]:
-        i += 1
-        logger.info(f"Uploading post {i}")
-        data = {
-            "title": post["title"],
-            "content": post["content"],
-            "category": post["category"],
-        }
-        response = requests.post(HOST + endpoint, json=data)
-        j = 0  
-        for comment in post.get("comments", []):
-            j += 1
-            logger.info(f"Uploading comment for post {i}")
-            comment_endpoint = f"/upload_comment/{response.json()['id']}"
-            comment_data = {
-                "content": comment["content"],
-                "author": comment["author"],
+
+    posts = iter_records("./Posts/posts_data.json")
+    selected = islice(posts, no_of_posts, 2 * no_of_posts) if no_of_posts else posts
+
+    def payload():
+        for post in selected:
+            comments = post.get("comments", [])
+            if no_of_comments:
+                comments = comments[:no_of_comments]
+            yield {
+                "title": post["title"],
+                "content": post["content"],
+                "category": post["category"],
+                "comments": [
+                    {"content": comment["content"], "author": comment["author"]}
+                    for comment in comments
+                ],
             }
-            try:
-                requests.post(HOST + comment_endpoint, json=comment_data)
-            except Exception as e:
-                logger.error(f"Error uploading comment {j} for post {i}: {e}")
 
-            if j == no_of_comments if no_of_comments else len(post.get("comments", [])):
-                break
-        
-        if i == no_of_posts if no_of_posts else len(posts):
-            break
+    logger.info("Uploading posts")
+    jobs = (("POST", "/upload_posts/bulk", batch, len(batch)) for batch in chunked(with_stable_ids(payload()), BATCH_SIZE))
+    uploader = Uploader(HOST, concurrency=4, checkpoint_path=CHECKPOINT_PATH)
+    asyncio.run(uploader.run(jobs, count_bulk_results))
 
 if __name__ == "__main__":
-    add_sample_posts()
\ No newline at end of file
+    add_sample_posts()
@@ -1,65 +1,45 @@
+import asyncio
 import json
-import requests
+import os
 import sys
-import time
+from typing import Iterator
 
-def load_json_file(file_path: str) -> list:
-    """Load and parse JSON data from file to get post IDs."""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import iter_records
+from uploader import Uploader, chunked
+
+def load_json_file(file_path: str) -> Iterator[str]:
+    """Stream post IDs from a JSON array or JSONL file."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-            return [post['id'] for post in data if 'id' in post]
+        for post in iter_records(file_path):
+            if 'id' in post:
+                yield post['id']
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON file: {e}")
-        return []
     except FileNotFoundError:
         print(f"File not found: {file_path}")
-        return []
     except Exception as e:
         print(f"Error reading file: {str(e)}")
-        return []
 
-def delete_posts(post_ids: list, base_url: str = "http://localhost:8000") -> None:
-    """Delete posts from the database using the FastAPI endpoint."""
-    successful = 0
-    failed = 0
-    total = len(post_ids)
+BATCH_SIZE = 1000
+CHECKPOINT_PATH = "./data/checkpoints/delete_all_posts.checkpoint"
 
-    print(f"Starting deletion of {total} posts...")
-
-    for index, post_id in enumerate(post_ids, 1):
-        try:
-            response = requests.delete(f"{base_url}/delete_post/{post_id}")
-            
-            if response.status_code == 200:
-                print(f"[{index}/{total}] Successfully deleted post with ID: {post_id}")
-                successful += 1
-            elif response.status_code == 404:
-                print(f"[{index}/{total}] Post not found: ID {post_id}")
-                failed += 1
-            else:
-                print(f"[{index}/{total}] Failed to delete post ID {post_id}. Status: {response.status_code}")
-                print(f"Response: {response.text}")
-                failed += 1
-            
-            time.sleep(0.5)
-            
-        except requests.exceptions.ConnectionError:
-            print("Error: Could not connect to the server. Make sure the FastAPI server is running.")
-            sys.exit(1)
-        except Exception as e:
-            print(f"Error deleting post ID {post_id}: {str(e)}")
-            failed += 1
+def delete_posts(post_ids, base_url: str = "http://localhost:8000") -> dict:
+    """Delete posts from the database using the bulk FastAPI endpoint."""
+    print("Starting deletion of posts...")
+    jobs = (
+        ("DELETE", "/delete_posts/bulk", {"ids": batch}, len(batch))
+        for batch in chunked(post_ids, BATCH_SIZE)
+    )
+    uploader = Uploader(base_url, checkpoint_path=CHECKPOINT_PATH)
+    # Ids that were already gone count as done, not as errors.
+    return asyncio.run(uploader.run(jobs))
 
 def main():
     file_path = "./Posts/old_posts.json"
-    
-    post_ids = load_json_file(file_path)
-    
-    if post_ids:
-        delete_posts(post_ids)
-    else:
-        print("No valid post IDs found in the JSON file")
+
+    delete_posts(load_json_file(file_path))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,227 @@
+"""Concurrent, resumable HTTP uploader shared by the seeding scripts.
+
+Jobs are sent through one pooled ``httpx.AsyncClient`` with at most
+``concurrency`` requests in flight. 429 and 5xx responses and connection
+errors are retried with exponential backoff (honouring ``Retry-After``).
+Bulk uploads give every post a stable id (``with_stable_ids``), which the
+server skips if it already has it, so a retried or resumed batch never
+inserts a post twice.
+Every finished job is appended to a checkpoint file, so an interrupted run
+skips the jobs it already completed when started again. Jobs are pulled
+lazily, so a streamed input starts uploading on its first batch.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+import uuid
+from collections import Counter
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import httpx
+
+
+def is_retryable(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+def job_key(method: str, path: str, payload) -> str:
+    """Stable id of a request, used to recognise it in the checkpoint file."""
+    body = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(f"{method} {path} {body}".encode()).hexdigest()
+
+
+def with_stable_ids(posts: Iterable[dict]) -> Iterator[dict]:
+    """Give each post an id derived from its content, unless it has one.
+
+    The same post gets the same id on every run, so the bulk endpoint can
+    recognise posts it already stored.
+    """
+    for post in posts:
+        if not post.get("id"):
+            body = json.dumps(post, sort_keys=True, ensure_ascii=False)
+            post = dict(post, id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"shiptalk-post:{body}")))
+        yield post
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    """Yield lists of up to ``size`` items without materialising ``items``."""
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Checkpoint:
+    """Append-only file of completed job keys."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = {line.strip() for line in f if line.strip()}
+        self._file = None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.done
+
+    def add(self, key: str) -> None:
+        self.done.add(key)
+        if not self.path:
+            return
+        if self._file is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(key + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def count_bulk_results(size: int, body: dict) -> Tuple[int, List[str]]:
+    """Count per-item outcomes of a ``/upload_posts/bulk`` response.
+
+    Posts the server already had (from an earlier attempt) count as succeeded.
+    """
+    errors = [result["error"] for result in body.get("results", []) if result.get("error")]
+    return body.get("created", size - len(errors)) + body.get("existing", 0), errors
+
+
+class Uploader:
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        concurrency: int = 8,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        timeout: float = 120,
+        checkpoint_path: Optional[str] = None,
+    ):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.retries = 0
+        self.errors = Counter()
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff * 2 ** attempt * (0.5 + random.random())
+
+    async def _send(self, client: httpx.AsyncClient, method: str, path: str, payload):
+        """Send one request, retrying transient failures; returns the final response."""
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = await client.request(method, path, json=payload)
+                if not is_retryable(response.status_code):
+                    return response
+                reason = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                reason = type(e).__name__
+                if attempt == self.max_retries:
+                    raise
+            if attempt < self.max_retries:
+                self.retries += 1
+                self.errors[f"retried: {reason}"] += 1
+                await asyncio.sleep(self._delay(attempt, response))
+        return response
+
+    async def _run_job(self, client, job, count: Callable):
+        key, method, path, payload, size = job
+        try:
+            response = await self._send(client, method, path, payload)
+        except httpx.TransportError as e:
+            self.failed += size
+            self.errors[type(e).__name__] += 1
+            return
+        if response.is_success:
+            ok, errors = count(size, response.json())
+            self.succeeded += ok
+            self.failed += len(errors)
+            for error in errors:
+                self.errors[error.splitlines()[0][:120]] += 1
+            self.checkpoint.add(key)
+        else:
+            self.failed += size
+            self.errors[f"HTTP {response.status_code}: {response.text[:120]}"] += 1
+        self._progress()
+
+    def _progress(self) -> None:
+        elapsed = time.perf_counter() - self._started
+        done = self.succeeded + self.failed
+        print(f"[{done}] {self.succeeded} ok, {self.failed} failed, {done / elapsed:.1f} items/s")
+
+    async def run(self, jobs: Iterable[tuple], count: Callable = None) -> dict:
+        """Run ``(method, path, payload, size)`` jobs and return a summary.
+
+        ``size`` is how many items (posts, ids) the job carries. ``count``
+        turns a successful response into ``(succeeded, errors)`` for those
+        items; by default every item of a 2xx response counts as succeeded.
+        """
+        count = count or (lambda size, body: (size, []))
+
+        def pending():
+            for method, path, payload, size in jobs:
+                key = job_key(method, path, payload)
+                if key in self.checkpoint:
+                    self.skipped += size
+                else:
+                    yield key, method, path, payload, size
+
+        queue = pending()
+
+        async def worker(client):
+            # Workers share one generator; next() never awaits, so pulls don't interleave.
+            for job in queue:
+                await self._run_job(client, job, count)
+
+        if self.checkpoint.done:
+            print(f"Resuming: skipping jobs recorded in {self.checkpoint.path}.")
+        print(f"Sending with {self.concurrency} requests in flight...")
+
+        self._started = time.perf_counter()
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        try:
+            async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=self.timeout) as client:
+                await asyncio.gather(*(worker(client) for _ in range(self.concurrency)))
+        finally:
+            self.checkpoint.close()
+        return self.summary(time.perf_counter() - self._started)
+
+    def summary(self, elapsed: float) -> dict:
+        summary = {
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "retries": self.retries,
+            "seconds": round(elapsed, 2),
+            "items_per_second": round((self.succeeded + self.failed) / elapsed, 1) if elapsed else 0.0,
+        }
+        print(
+            f"Done in {summary['seconds']}s: {self.succeeded} succeeded, {self.failed} failed, "
+            f"{self.skipped} skipped, {self.retries} retries ({summary['items_per_second']} items/s)."
+        )
+        for error, times in self.errors.most_common(10):
+            print(f"  {times} x {error}")
+        return summary
@@ -0,0 +1,60 @@
+"""Compare near-duplicate detection with MinHash/LSH against brute force.
+
+Before: every post was compared with every kept post by exact Jaccard
+similarity of its shingles, which grows quadratically with the corpus.
+After: NearDuplicateIndex only compares a post with the candidates that
+share an LSH band with it.
+
+    python benchmarks/bench_dedup.py [path/to/posts.json]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dedup import DEDUP_THRESHOLD, NearDuplicateIndex, jaccard, post_text, shingles
+from json_stream import iter_records
+
+
+def brute_force(posts):
+    kept = []
+    duplicates = set()
+    for number, post in enumerate(posts):
+        hashes = shingles(post_text(post))
+        if not hashes:
+            continue
+        if any(jaccard(hashes, other) >= DEDUP_THRESHOLD for other in kept):
+            duplicates.add(number)
+        else:
+            kept.append(hashes)
+    return duplicates
+
+
+def indexed(posts):
+    index = NearDuplicateIndex()
+    return {number for number, post in enumerate(posts) if not index.add_if_new(number, post_text(post))}
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "data", "final_posts.json")
+    posts = list(iter_records(path))
+    index = NearDuplicateIndex()
+
+    expected, old = timed(brute_force, posts)
+    found, new = timed(indexed, posts)
+    recall = len(found & expected) / len(expected) if expected else 1.0
+    print(f"{len(posts)} posts, threshold {DEDUP_THRESHOLD}, {index.bands} bands x {index.rows} rows")
+    print(f"{'brute force (s)':>18} {old:>8.2f}  {len(expected)} duplicates")
+    print(f"{'minhash/lsh (s)':>18} {new:>8.2f}  {len(found)} duplicates, recall {recall:.2f}  {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Compare the scraper's keyword filter before and after the compiled matcher.
+
+Before: matches_keywords looped over every topic and keyword, lowering the
+text again for each one, and filter_posts ran it on title and content.
+After: KeywordMatcher scans each text once with a single compiled regex,
+and classify also counts hits per topic to pick a category.
+
+    python benchmarks/bench_keywords.py [path/to/posts.json]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "create-posts"))
+
+from json_stream import iter_records
+from keywords import TOPICS_KEYWORDS, KeywordMatcher
+
+REPEAT = 5
+
+
+def old_matches_keywords(text):
+    for keywords in TOPICS_KEYWORDS.values():
+        if any(keyword.lower() in text.lower() for keyword in keywords):
+            return True
+    return False
+
+
+def before(posts):
+    return [post for post in posts if old_matches_keywords(post["title"]) or old_matches_keywords(post["content"])]
+
+
+def after_filter(matcher, posts):
+    return [post for post in posts if matcher.matches(f"{post['title']}\n{post['content']}")]
+
+
+def after_classify(matcher, posts):
+    return [matcher.classify(f"{post['title']}\n{post['content']}") for post in posts]
+
+
+def substring_counts(text):
+    """Reference overlapping occurrence counts of every keyword."""
+    text = text.lower()
+    counts = {}
+    for keyword in {keyword.lower() for keywords in TOPICS_KEYWORDS.values() for keyword in keywords}:
+        start = text.find(keyword)
+        while start != -1:
+            counts[keyword] = counts.get(keyword, 0) + 1
+            start = text.find(keyword, start + 1)
+    return counts
+
+
+def best_of(fn, *args) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "data", "final_posts.json")
+    posts = list(iter_records(path))
+    matcher = KeywordMatcher()
+
+    assert [id(post) for post in before(posts)] == [id(post) for post in after_filter(matcher, posts)]
+    for post in posts:
+        text = f"{post['title']}\n{post['content']}"
+        assert matcher.keyword_counts(text) == substring_counts(text), post["title"]
+
+    old = best_of(before, posts)
+    new = best_of(after_filter, matcher, posts)
+    classify = best_of(after_classify, matcher, posts)
+    kept = len(before(posts))
+    print(f"{len(posts)} posts, {kept} match a topic")
+    print(f"{'before filter (ms)':>22} {old * 1000:>8.1f}")
+    print(f"{'after filter (ms)':>22} {new * 1000:>8.1f}  {old / new:.1f}x")
+    print(f"{'after classify (ms)':>22} {classify * 1000:>8.1f}  {old / classify:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare response serialization cost before and after the typed response models.
+
+Before: endpoints returned raw SQLAlchemy objects, which FastAPI pushed through
+jsonable_encoder and the stdlib-json JSONResponse.
+After: the response model validates the objects via from_attributes,
+pydantic-core serializes them and ORJSONResponse renders the bytes.
+
+    python benchmarks/bench_serialization.py
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy.orm.attributes import set_committed_value
+
+from sql_app.models import Comment, Post
+from sql_app.schemas import AllPosts
+
+SIZES = (100, 1000, 10000)
+COMMENTS_PER_POST = 3
+REPEAT = 3
+
+
+def make_posts(n: int) -> list:
+    posts = []
+    for i in range(n):
+        post = Post(
+            id=f"post-{i}",
+            title=f"Shipping question number {i}",
+            content="Looking for a carrier that can move three pallets from Malaga to Niamey. " * 4,
+            upvotes=i % 50,
+            author="Anonymous",
+            category="Carrier Comparison",
+            created_at=datetime(2024, 11, 18, 11, 57, 41),
+        )
+        # Load the thread the way a query would, without firing backrefs.
+        comments = [
+            Comment(
+                id=f"comment-{i}-{j}",
+                content="Try a freight forwarder that consolidates LTL shipments.",
+                upvotes=j,
+                author="PJ-time",
+                created_at=datetime(2024, 11, 18, 12, 26, 36),
+                post_id=post.id,
+            )
+            for j in range(COMMENTS_PER_POST)
+        ]
+        set_committed_value(post, "comments", comments)
+        posts.append(post)
+    return posts
+
+
+def before(payload: dict) -> bytes:
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def after(payload: dict, field) -> bytes:
+    content = asyncio.run(serialize_response(field=field, response_content=payload))
+    return ORJSONResponse(content).body
+
+
+def best_of(fn, *args) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    field = create_model_field("Response", AllPosts, mode="serialization")
+    print(f"{'posts':>8} {'before (ms)':>12} {'after (ms)':>12} {'speedup':>8}")
+    for n in SIZES:
+        payload = {"posts": make_posts(n), "total_posts": n}
+        assert len(before(payload)) and len(after(payload, field))
+        old = best_of(before, payload)
+        new = best_of(after, payload, field)
+        print(f"{n:>8} {old * 1000:>12.1f} {new * 1000:>12.1f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
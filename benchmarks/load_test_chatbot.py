@@ -0,0 +1,78 @@
+"""Load test the /AI_bot/ endpoint.
+
+Start the server against an offline backend so no OpenAI calls are made:
+
+    LLM_BACKEND=fake LLM_FAKE_LATENCY=0.8 uvicorn main:app --workers 4
+
+then run:
+
+    python benchmarks/load_test_chatbot.py --requests 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+QUESTIONS = [
+    "What is the cheapest carrier for shipping pallets to Europe?",
+    "How do I ship heavy equipment internationally?",
+    "Which 3PL is best for a small e-commerce brand?",
+    "How can I reduce last mile delivery costs?",
+    "What packaging prevents damage on long freight routes?",
+    "How do freight brokers charge for LTL shipments?",
+]
+
+
+async def ask(client: httpx.AsyncClient, path: str, question: str, latencies: list, errors: list):
+    start = time.perf_counter()
+    try:
+        response = await client.post(path, json={"question": question})
+        if response.status_code != 200 or "error" in response.json():
+            errors.append(response.status_code)
+    except httpx.HTTPError as e:
+        errors.append(type(e).__name__)
+    latencies.append(time.perf_counter() - start)
+
+
+async def run(base_url: str, path: str, total: int, concurrency: int, unique: bool):
+    latencies, errors = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def worker(i: int):
+            question = QUESTIONS[i % len(QUESTIONS)]
+            if unique:
+                question = f"{question} (request {i})"
+            async with semaphore:
+                await ask(client, path, question, latencies, errors)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{total} requests, concurrency {concurrency}, {elapsed:.2f}s")
+    print(f"Throughput: {total / elapsed:.1f} req/s, errors: {len(errors)}")
+    print(
+        f"Latency p50 {statistics.median(latencies) * 1000:.0f} ms, "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} ms, "
+        f"max {latencies[-1] * 1000:.0f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/AI_bot/")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--unique", action="store_true", help="make every question unique to bypass the answer cache")
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.path, args.requests, args.concurrency, args.unique))
+
+
+if __name__ == "__main__":
+    main()
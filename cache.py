@@ -0,0 +1,347 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+class CacheBackend(ABC):
+    """Key/value store for JSON-serialisable values with TTL and LRU eviction."""
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 1000, max_bytes: int = 16 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    def _get(self, key: str):
+        """Return the stored JSON string for ``key``, or None if absent or expired."""
+
+    @abstractmethod
+    def _set(self, key: str, value: str, expires_at: float) -> None:
+        ...
+
+    @abstractmethod
+    def _set_unless(self, key: str, value: str, expires_at: float, superseded) -> bool:
+        """Atomically store ``value`` unless ``superseded(current value)`` is true."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def get(self, key: str):
+        raw = self._get(key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value, ttl: float = None) -> None:
+        raw = json.dumps(value)
+        if len(raw) > self.max_bytes:
+            return
+        self._set(key, raw, time.time() + (self.ttl if ttl is None else ttl))
+
+    def set_unless(self, key: str, value, superseded, ttl: float = None) -> bool:
+        """Store ``value`` unless the live entry for ``key`` makes ``superseded`` return True.
+
+        The check and the write happen atomically, also across processes
+        sharing a SQLite cache. Returns whether ``value`` was stored.
+        """
+        raw = json.dumps(value)
+        if len(raw) > self.max_bytes:
+            return False
+        return self._set_unless(key, raw, time.time() + (self.ttl if ttl is None else ttl), superseded)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class MemoryCache(CacheBackend):
+    """Per-process LRU cache bounded by entry count and total value size."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _pop(self, key: str) -> None:
+        raw, _ = self._entries.pop(key)
+        self._bytes -= len(raw)
+
+    def _get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            raw, expires_at = entry
+            if expires_at <= time.time():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return raw
+
+    def _store(self, key: str, value: str, expires_at: float) -> None:
+        if key in self._entries:
+            self._pop(key)
+        self._entries[key] = (value, expires_at)
+        self._bytes += len(value)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _set(self, key: str, value: str, expires_at: float) -> None:
+        with self._lock:
+            self._store(key, value, expires_at)
+
+    def _set_unless(self, key: str, value: str, expires_at: float, superseded) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time() and superseded(json.loads(entry[0])):
+                return False
+            self._store(key, value, expires_at)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        return dict(super().stats(), bytes=self._bytes)
+
+
+class SQLiteCache(CacheBackend):
+    """Disk-backed cache that several worker processes on one host can share.
+
+    Entry count and total value size live in a one-row ``cache_stats`` table
+    that triggers keep current inside each write, so checking the limits
+    after a ``set`` is a single-row read. When a limit is exceeded, expired
+    entries are purged first, then the least recently used ones are dropped
+    in batches.
+    """
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS cache ("
+        "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+        "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_cache_accessed_at ON cache (accessed_at)",
+        "CREATE INDEX IF NOT EXISTS ix_cache_expires_at ON cache (expires_at)",
+        "CREATE TABLE IF NOT EXISTS cache_stats ("
+        "id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, bytes INTEGER NOT NULL)",
+        # Counts any entries left by a version of this cache without the stats table.
+        "INSERT OR IGNORE INTO cache_stats (id, entries, bytes) "
+        "SELECT 0, COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache",
+        "CREATE TRIGGER IF NOT EXISTS cache_stats_ai AFTER INSERT ON cache BEGIN "
+        "UPDATE cache_stats SET entries = entries + 1, bytes = bytes + LENGTH(new.value); END",
+        "CREATE TRIGGER IF NOT EXISTS cache_stats_ad AFTER DELETE ON cache BEGIN "
+        "UPDATE cache_stats SET entries = entries - 1, bytes = bytes - LENGTH(old.value); END",
+        "CREATE TRIGGER IF NOT EXISTS cache_stats_au AFTER UPDATE OF value ON cache BEGIN "
+        "UPDATE cache_stats SET bytes = bytes - LENGTH(old.value) + LENGTH(new.value); END",
+    ]
+
+    def __init__(self, path: str = "./data/cache.sqlite3", evict_fraction: float = 0.1, **kwargs):
+        super().__init__(**kwargs)
+        self.evict_fraction = evict_fraction
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # One transaction, so workers starting together agree on the stats row.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in self.SCHEMA:
+                    self._conn.execute(statement)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _totals(self) -> tuple:
+        return self._conn.execute("SELECT entries, bytes FROM cache_stats").fetchone()
+
+    def __len__(self):
+        with self._lock:
+            return self._totals()[0]
+
+    def _get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def _upsert(self, key: str, value: str, expires_at: float, now: float) -> None:
+        # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete
+        # doesn't fire the delete trigger, which would skew the stats.
+        self._conn.execute(
+            "INSERT INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, "
+            "expires_at = excluded.expires_at, accessed_at = excluded.accessed_at",
+            (key, value, expires_at, now),
+        )
+
+    def _set(self, key: str, value: str, expires_at: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._upsert(key, value, expires_at, now)
+            if self._over_limit(*self._totals()):
+                self._evict(now)
+
+    def _set_unless(self, key: str, value: str, expires_at: float, superseded) -> bool:
+        now = time.time()
+        with self._lock:
+            # Holding the write lock from the read to the write keeps other
+            # processes from changing the entry in between.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now and superseded(json.loads(row[0])):
+                    self._conn.execute("COMMIT")
+                    return False
+                self._upsert(key, value, expires_at, now)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            if self._over_limit(*self._totals()):
+                self._evict(now)
+            return True
+
+    def _over_limit(self, entries: int, size: int) -> bool:
+        return entries > self.max_entries or size > self.max_bytes
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        entries, size = self._totals()
+        # Evicting a slice of the cache at a time means the next sets don't
+        # have to evict again.
+        batch = max(int(self.max_entries * self.evict_fraction), 1)
+        while self._over_limit(entries, size) and entries:
+            removed = self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (max(entries - self.max_entries, batch),),
+            ).rowcount
+            self.evictions += removed
+            entries, size = self._totals()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._totals()[1]
+        return dict(super().stats(), bytes=size)
+
+
+def make_cache(backend: str = "memory", path: str = None, **kwargs) -> CacheBackend:
+    """Build a cache backend by name (``memory`` or ``sqlite``)."""
+    if backend == "memory":
+        return MemoryCache(**kwargs)
+    if backend == "sqlite":
+        return SQLiteCache(path, **kwargs) if path else SQLiteCache(**kwargs)
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+class SingleFlight:
+    """Collapse concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for it and receive a deep copy of the same result (or the
+    same exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+    def join(self, key: str) -> tuple:
+        """Return ``(call, leader)`` for ``key``.
+
+        The leader must hand its outcome to ``finish``; anyone else passes
+        ``call`` to ``wait``. ``do`` wraps both for plain functions.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+            else:
+                self.shared += 1
+        return call, leader
+
+    def wait(self, call: dict):
+        call["done"].wait()
+        if call["error"] is not None:
+            raise call["error"]
+        return copy.deepcopy(call["result"])
+
+    def finish(self, key: str, call: dict, result=None, error: BaseException = None) -> None:
+        call["result"] = result
+        call["error"] = error
+        with self._lock:
+            del self._calls[key]
+        call["done"].set()
+
+    def do(self, key: str, fn):
+        call, leader = self.join(key)
+        if not leader:
+            return self.wait(call)
+
+        result = error = None
+        try:
+            result = fn()
+            return copy.deepcopy(result)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.finish(key, call, result, error)
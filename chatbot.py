@@ -1,11 +1,37 @@
+import hashlib
 import json
+import logging
+import os
 import re
+import threading
 from openai import RateLimitError
 from sqlalchemy.orm import Session
-from langchain_openai import ChatOpenAI
 
-from sql_app.models import Post
+from search_index import BM25Index, post_index
+from sql_app.conditional import feed_state
+from cache import SingleFlight, make_cache
+from prompt_packer import count_tokens, pack_posts
+from llm_backends import LLMBackend, make_backend
 
+logger = logging.getLogger(__name__)
+
+CHATBOT_TOP_K = int(os.getenv("CHATBOT_TOP_K", "8"))
+CHATBOT_TOKEN_BUDGET = int(os.getenv("CHATBOT_TOKEN_BUDGET", "6000"))
+CHATBOT_MAX_POST_TOKENS = int(os.getenv("CHATBOT_MAX_POST_TOKENS", "600"))
+
+answer_cache = make_cache(
+    os.getenv("ANSWER_CACHE_BACKEND", "memory"),
+    path=os.getenv("ANSWER_CACHE_PATH"),
+    ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+    max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000")),
+    max_bytes=int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+)
+
+inflight = SingleFlight()
+
+_llm = None
+_llm_lock = threading.Lock()
+_reload_lock = threading.Lock()
 
 system_prompt = """
 You are an AI model specialized in answering questions related to posts on a discussion forum. You have been provided with a list of posts and their content in JSON format. Your task is to analyze the posts and provide answers to user queries based on the users' posts and answer the queries to help the user, along with the IDs and titles of the posts where related discussions occur.
@@ -25,38 +51,151 @@ Example JSON structure: { "content": "", "related_posts": [ { "title": "", "id":
 """
 
 
-
-
 def sanitize_json_string(json_string: str) -> str:
     json_string = re.sub(r"[\x00-\x1f\x7f]", "", json_string)
     return json_string
 
 
-def LLM(question: str, db: Session):
-    try:
-        posts = db.query(Post).all()
-    except Exception as e:
-        return {"error": f"An error occurred while fetching posts: {str(e)}"}
-    data = {"posts": []}
+def normalize_question(question: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+
+def answer_cache_key(question: str, corpus_version: int) -> str:
+    digest = hashlib.sha256(normalize_question(question).encode()).hexdigest()
+    return f"answer:{corpus_version}:{digest}"
+
+
+def retrieve_posts(question: str, index: BM25Index, k: int = CHATBOT_TOP_K,
+                   token_budget: int = CHATBOT_TOKEN_BUDGET) -> tuple:
+    """Pick the top-k posts for a question and pack them into the token budget."""
+    posts = []
+    for post_id, _score in index.search(question, k):
+        doc = index.get(post_id)
+        posts.append({"id": doc["id"], "title": doc["title"], "content": doc["content"]})
+    return pack_posts(posts, token_budget, CHATBOT_MAX_POST_TOKENS)
+
+
+def get_llm() -> LLMBackend:
+    """Return the process-wide LLM backend (``LLM_BACKEND``), creating it on first use.
+
+    Reusing one client keeps its HTTP connections alive between requests.
+    """
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                _llm = make_backend(model="gpt-4o")
+    return _llm
 
-    for post in posts:
-        data["posts"].append(
-            {"id": post.id, "title": post.title, "content": post.content}
-        )
 
+def build_messages(question: str) -> list:
+    posts, stats = retrieve_posts(question, post_index)
     messages = [
         {"role": "system", "content": system_prompt},
-        {"role": "system", "content": "Post_Data =" + json.dumps(data)},
+        {"role": "system", "content": "Post_Data =" + json.dumps({"posts": posts}, ensure_ascii=False)},
         {"role": "user", "content": f"Question: {question}"},
     ]
+    prompt_tokens = sum(count_tokens(message["content"]) for message in messages)
+    logger.info(
+        f"Packed {stats['posts']} posts into {stats['tokens']}/{stats['budget']} tokens "
+        f"({stats['truncated']} truncated, {stats['skipped']} skipped); prompt is {prompt_tokens} tokens."
+    )
+    return messages
 
-    llm = ChatOpenAI(model="gpt-4o")
+
+def ensure_index(db: Session):
+    """Load the post index, or reload it once another worker has changed posts
+    or comments since it was built; returns an error dict if that fails.
+
+    Afterwards ``post_index.content_version`` is the corpus version answers
+    are cached under. Only content changes move it, so likes keep answers.
+    """
+    try:
+        content_version = feed_state(db)[1]
+        if not post_index.is_current(content_version):
+            with _reload_lock:
+                if not post_index.is_current(content_version):
+                    post_index.load(db)
+    except Exception as e:
+        return {"error": f"An error occurred while fetching posts: {str(e)}"}
+    return None
+
+
+def LLM(question: str, db: Session):
+    error = ensure_index(db)
+    if error:
+        return error
+
+    cache_key = answer_cache_key(question, post_index.content_version)
+    cached = answer_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Identical questions asked while one is already in flight share its call.
+    return inflight.do(cache_key, lambda: answer(question, cache_key))
+
+
+def answer(question: str, cache_key: str) -> dict:
+    messages = build_messages(question)
+
+    llm = get_llm()
     try:
         response = llm.invoke(messages)
-        response = sanitize_json_string(response.content)
+        response = sanitize_json_string(response)
         response = json.loads(response)
+        answer_cache.set(cache_key, response)
         return response
     except RateLimitError as e:
         return {"error": f"Rate limit exceeded. Please try again later. {str(e)}"}
     except Exception as e:
         return {"error": f"An error occurred while processing the request: {str(e)}"}
+
+
+def LLM_stream(question: str, version: int):
+    """Yield ``("token", text)`` pairs as the model generates, then ``("result", response)``.
+
+    The post index must already be loaded (see ``ensure_index``) and
+    ``version`` read from ``post_index.content_version`` before streaming starts.
+
+    Identical questions share one model call through ``inflight``: the
+    first streams its tokens, the rest wait for its answer and get it as a
+    single token, as on a cache hit.
+    """
+    cache_key = answer_cache_key(question, version)
+    cached = answer_cache.get(cache_key)
+    if cached is not None:
+        yield "token", json.dumps(cached)
+        yield "result", cached
+        return
+
+    while True:
+        call, leader = inflight.join(cache_key)
+        if leader:
+            break
+        response = inflight.wait(call)
+        if response is not None:
+            yield "token", json.dumps(response)
+            yield "result", response
+            return
+        # The leader's client disconnected before the answer was complete;
+        # take over the question.
+
+    response = None
+    try:
+        messages = build_messages(question)
+
+        llm = get_llm()
+        chunks = []
+        try:
+            for chunk in llm.stream(messages):
+                chunks.append(chunk)
+                yield "token", chunk
+            response = json.loads(sanitize_json_string("".join(chunks)))
+            answer_cache.set(cache_key, response)
+        except RateLimitError as e:
+            response = {"error": f"Rate limit exceeded. Please try again later. {str(e)}"}
+        except Exception as e:
+            response = {"error": f"An error occurred while processing the request: {str(e)}"}
+    finally:
+        inflight.finish(cache_key, call, response)
+    yield "result", response
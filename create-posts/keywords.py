@@ -0,0 +1,105 @@
+"""Topic keyword matching for the scraper.
+
+``KeywordMatcher`` compiles every keyword of ``TOPICS_KEYWORDS`` into one
+regex, factored as a trie so each position of the lowercased text costs
+about one character comparison, and scans a text once. Matching resumes one
+character after each match start, so it finds the longest keyword starting
+at every position, including overlapping ones. Shorter keywords starting at
+the same position are prefixes of that longest one and are counted through a
+precomputed prefix table, so every keyword occurrence is counted exactly as
+a substring search would find it.
+"""
+import re
+from collections import Counter
+
+TOPICS_KEYWORDS = {
+    "Parcel Shipping": ["parcel shipping", "package shipping", "parcel delivery", "package transit"],
+    "Sustainable Packaging": ["eco-friendly packaging", "sustainable packaging", "green packaging"],
+    "Last Mile Innovation": ["last mile delivery", "last mile solutions", "final delivery stage"],
+    "Integration": ["system integration", "platform integration", "integration with"],
+    "Carrier Solutions": ["carrier options", "carrier comparison", "shipping carriers", "freight carriers"],
+    "Eco-Friendly": ["eco-friendly", "environmentally friendly", "sustainable", "green"],
+    "3-2-1 Shipping": ["3-2-1 shipping", "3-2-1 logistics"],
+    "Just-In-Time Inventory": ["just-in-time inventory", "JIT inventory", "inventory management"],
+    "Cross-Docking": ["cross-docking", "dock transfer", "direct unloading"],
+    "Distributed Inventory": ["distributed inventory", "inventory distribution", "regional inventory"],
+    "Last-Mile Delivery Solutions": ["last-mile solutions", "last-mile logistics", "final mile delivery"],
+    "Freight Consolidation": ["freight consolidation", "shipment consolidation", "consolidated freight"],
+    "Dynamic Routing": ["dynamic routing", "adaptive routing", "route optimization"],
+    "Third-Party Logistics (3PL)": ["third-party logistics", "3PL", "outsourced logistics"],
+    "Seasonal Planning": ["seasonal planning", "holiday planning", "peak season planning"],
+    "Cycle Counting": ["cycle counting", "inventory counting", "inventory auditing"],
+    "Sales and Operations Planning (S&OP)": ["sales and operations planning", "S&OP", "sales planning"],
+    "Cost-to-Serve Analysis": ["cost-to-serve", "cost analysis", "serve cost analysis"],
+}
+
+
+def trie_pattern(words) -> str:
+    """Regex matching any of ``words``, longest first, with shared prefixes factored out."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 and "" not in node else f"(?:{'|'.join(branches)})"
+        # Greedy "?" tries the longer keyword before stopping at this one.
+        return body + "?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    def __init__(self, topics_keywords: dict = TOPICS_KEYWORDS):
+        self.topics = list(topics_keywords)
+        self.keyword_topics = {}
+        for topic, keywords in topics_keywords.items():
+            for keyword in keywords:
+                self.keyword_topics.setdefault(keyword.lower(), []).append(topic)
+
+        keywords = list(self.keyword_topics)
+        self.pattern = re.compile(trie_pattern(keywords))
+        self.prefixes = {
+            keyword: [other for other in keywords if other != keyword and keyword.startswith(other)]
+            for keyword in keywords
+        }
+
+    def matches(self, text: str) -> bool:
+        """True if any keyword occurs in ``text``."""
+        return self.pattern.search(text.lower()) is not None
+
+    def keyword_counts(self, text: str) -> Counter:
+        """Occurrences of each keyword in ``text``, overlapping ones included."""
+        text = text.lower()
+        counts = Counter()
+        match = self.pattern.search(text)
+        while match:
+            keyword = match.group()
+            counts[keyword] += 1
+            for prefix in self.prefixes[keyword]:
+                counts[prefix] += 1
+            match = self.pattern.search(text, match.start() + 1)
+        return counts
+
+    def topic_counts(self, text: str) -> Counter:
+        """Keyword hits per topic in ``text``."""
+        counts = Counter()
+        for keyword, hits in self.keyword_counts(text).items():
+            for topic in self.keyword_topics[keyword]:
+                counts[topic] += hits
+        return counts
+
+    def classify(self, text: str, default: str = None):
+        """The topic with the most hits, ties going to the earlier topic; ``default`` if none."""
+        counts = self.topic_counts(text)
+        if not counts:
+            return default
+        return max(self.topics, key=lambda topic: counts[topic])
+
+
+matcher = KeywordMatcher()
@@ -1,11 +1,24 @@
 import praw
-import json
+import prawcore
 import os
+import sys
 import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 import re
-import openai
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import NearDuplicateIndex, post_text
+from json_stream import append_records, iter_records, write_records
+from keywords import matcher
+from paraphrase import Paraphraser
+from rate_limit import TokenBucket
+from scrape_state import ScrapeState
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -14,14 +27,28 @@ load_dotenv()
 REDDIT_CLIENT_ID = os.getenv('REDDIT_CLIENT_ID')
 REDDIT_CLIENT_SECRET = os.getenv('REDDIT_CLIENT_SECRET')
 REDDIT_USER_AGENT = os.getenv('REDDIT_USER_AGENT')
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-openai.api_key = OPENAI_API_KEY
 
 OUTPUT_SCRAPED_FILE = "./data/scraped_posts.json"
 FILTERED_DATA_FILE = "./data/filtered_posts.json"
 FINAL_CLEANED_FILE = "./data/ready_posts.json"
 
+# Scraping stops starting new subreddits (in SUBREDDITS order) once this
+# many unique posts are collected; the last subreddit is kept whole.
 TARGET_UNIQUE_POSTS = 5
+POSTS_PER_SUBREDDIT = 100
+
+# Reddit allows 100 OAuth requests per minute per client; every thread draws
+# from this one budget.
+REDDIT_REQUESTS_PER_MINUTE = float(os.getenv("REDDIT_REQUESTS_PER_MINUTE", "100"))
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "8"))
+
+# Incremental runs only fetch submissions newer than each subreddit's mark in
+# SCRAPE_STATE_PATH, take all of them (no TARGET_UNIQUE_POSTS cap or
+# POSTS_PER_SUBREDDIT limit, which would skip posts below the new mark) and
+# append to the output files. A subreddit without a mark yet starts from its
+# newest POSTS_PER_SUBREDDIT submissions.
+INCREMENTAL_SCRAPE = os.getenv("INCREMENTAL_SCRAPE", "false").lower() in ("1", "true", "yes")
+SCRAPE_STATE_PATH = os.getenv("SCRAPE_STATE_PATH", "./data/scrape_state.json")
 
 SUBREDDITS = [
     "logistics", "shipping", "supplychain", "freight", "transportation", "operations",
@@ -31,45 +58,40 @@ SUBREDDITS = [
     "freightbrokers", "logisticstechnology"
 ]
 
-TOPICS_KEYWORDS = {
-    "Parcel Shipping": ["parcel shipping", "package shipping", "parcel delivery", "package transit"],
-    "Sustainable Packaging": ["eco-friendly packaging", "sustainable packaging", "green packaging"],
-    "Last Mile Innovation": ["last mile delivery", "last mile solutions", "final delivery stage"],
-    "Integration": ["system integration", "platform integration", "integration with"],
-    "Carrier Solutions": ["carrier options", "carrier comparison", "shipping carriers", "freight carriers"],
-    "Eco-Friendly": ["eco-friendly", "environmentally friendly", "sustainable", "green"],
-    "3-2-1 Shipping": ["3-2-1 shipping", "3-2-1 logistics"],
-    "Just-In-Time Inventory": ["just-in-time inventory", "JIT inventory", "inventory management"],
-    "Cross-Docking": ["cross-docking", "dock transfer", "direct unloading"],
-    "Distributed Inventory": ["distributed inventory", "inventory distribution", "regional inventory"],
-    "Last-Mile Delivery Solutions": ["last-mile solutions", "last-mile logistics", "final mile delivery"],
-    "Freight Consolidation": ["freight consolidation", "shipment consolidation", "consolidated freight"],
-    "Dynamic Routing": ["dynamic routing", "adaptive routing", "route optimization"],
-    "Third-Party Logistics (3PL)": ["third-party logistics", "3PL", "outsourced logistics"],
-    "Seasonal Planning": ["seasonal planning", "holiday planning", "peak season planning"],
-    "Cycle Counting": ["cycle counting", "inventory counting", "inventory auditing"],
-    "Sales and Operations Planning (S&OP)": ["sales and operations planning", "S&OP", "sales planning"],
-    "Cost-to-Serve Analysis": ["cost-to-serve", "cost analysis", "serve cost analysis"],
-}
-
-reddit = praw.Reddit(
-    client_id=REDDIT_CLIENT_ID,
-    client_secret=REDDIT_CLIENT_SECRET,
-    user_agent=REDDIT_USER_AGENT
-)
-
-unique_posts = []
-seen_titles = set()
-
-def save_data(data, file_path):
-    """Save data to a file."""
+
+request_budget = TokenBucket(REDDIT_REQUESTS_PER_MINUTE / 60, capacity=10)
+
+
+class RateLimitedRequestor(prawcore.Requestor):
+    """Takes a token from the shared budget before every Reddit HTTP request."""
+
+    def request(self, *args, **kwargs):
+        request_budget.acquire()
+        return super().request(*args, **kwargs)
+
+
+_local = threading.local()
+
+def get_reddit():
+    """Return this thread's Reddit client; praw instances are not thread-safe."""
+    if not hasattr(_local, "reddit"):
+        _local.reddit = praw.Reddit(
+            client_id=REDDIT_CLIENT_ID,
+            client_secret=REDDIT_CLIENT_SECRET,
+            user_agent=REDDIT_USER_AGENT,
+            requestor_class=RateLimitedRequestor,
+        )
+    return _local.reddit
+
+def save_data(data, file_path, append=False):
+    """Stream records to a JSON array file, or JSONL if the path ends in .jsonl."""
     try:
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, 'w') as file:
-            json.dump(data, file, indent=4)
-        logging.info(f"Data saved to {file_path}.")
+        count = append_records(file_path, data) if append else write_records(file_path, data)
+        logging.info(f"Data saved to {file_path} ({count} records).")
+        return True
     except Exception as e:
         logging.error(f"Failed to save data to {file_path}: {e}")
+        return False
 
 def clean_content(content):
     """Clean content text."""
@@ -79,27 +101,11 @@ def clean_content(content):
     clean_text = re.sub(r"\s+", " ", clean_text).strip()
     return clean_text
 
-def paraphrase_content(content):
-    """Paraphrase content using OpenAI."""
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an assistant that paraphrases text concisely while preserving its original meaning."},
-                {"role": "user", "content": f"Paraphrase the following text:\n\n{content}"}
-            ],
-            max_tokens=500,
-            temperature=0.7,
-        )
-        return response["choices"][0]["message"]["content"].strip()
-    except Exception as e:
-        logging.error(f"Error during paraphrasing: {e}")
-        return content
-
-def fetch_comments(submission, max_comments=5):
+def fetch_comments(submission_id, max_comments=5):
     """Fetch comments from a submission."""
     comments = []
     try:
+        submission = get_reddit().submission(id=submission_id)
         submission.comments.replace_more(limit=0)
         for comment in submission.comments[:max_comments]:
             comments.append({
@@ -114,22 +120,35 @@ def fetch_comments(submission, max_comments=5):
 
 def matches_keywords(text):
     """Check if a text matches any of the keywords in the TOPICS_KEYWORDS."""
-    for keywords in TOPICS_KEYWORDS.values():
-        if any(keyword.lower() in text.lower() for keyword in keywords):
-            return True
-    return False
+    return matcher.matches(text)
 
 def filter_posts(posts):
-    """Filter posts based on relevance to TOPICS_KEYWORDS."""
-    filtered_posts = [post for post in posts if matches_keywords(post['title']) or matches_keywords(post['content'])]
+    """Keep posts relevant to TOPICS_KEYWORDS and set each one's category to its top topic."""
+    filtered_posts = []
+    for post in posts:
+        # Keywords never contain a newline, so joining can't create new matches.
+        category = matcher.classify(f"{post['title']}\n{post['content']}")
+        if category:
+            post['category'] = category
+            filtered_posts.append(post)
     return sorted(filtered_posts, key=lambda x: (x['upvotes'], len(x['comments'])), reverse=True)
 
-def scrape_subreddit(subreddit, limit=100):
-    """Scrape subreddit posts."""
+def scrape_subreddit(subreddit, limit=POSTS_PER_SUBREDDIT, state=None):
+    """Scrape subreddit posts, without their comments.
+
+    With a ``state``, reading stops at the first submission at or below the
+    subreddit's mark; the listing is newest first, so only new pages are fetched.
+    A subreddit with a mark is read back to it whatever ``limit`` says, since
+    stopping early would move the mark past submissions never read.
+    """
     results = []
+    if state is not None and state.get(subreddit) is not None:
+        limit = None
     try:
-        posts = reddit.subreddit(subreddit).new(limit=limit)
+        posts = get_reddit().subreddit(subreddit).new(limit=limit)
         for submission in posts:
+            if state is not None and state.is_seen(subreddit, submission.id, submission.created_utc):
+                break
             post = {
                 "id": submission.id,
                 "title": submission.title.strip(),
@@ -139,7 +158,7 @@ def scrape_subreddit(subreddit, limit=100):
                 "upvotes": submission.score,
                 "created_at": datetime.fromtimestamp(submission.created_utc, timezone.utc).isoformat(),
                 "url": submission.url,
-                "comments": fetch_comments(submission),
+                "comments": [],
             }
             results.append(post)
             logging.info(f"Scraped post ID: {submission.id}")
@@ -147,25 +166,95 @@ def scrape_subreddit(subreddit, limit=100):
         logging.error(f"Error fetching posts from subreddit {subreddit}: {e}")
     return results
 
-def scrape_unique_posts():
-    """Scrape unique posts across subreddits."""
-    global unique_posts, seen_titles
-    while len(unique_posts) < TARGET_UNIQUE_POSTS:
+def scrape_unique_posts(state=None, dedup=None):
+    """Scrape unique posts across subreddits in parallel.
+
+    Subreddits are taken in ``SUBREDDITS`` order and every unique post of a
+    scraped subreddit is kept; no further subreddit is started once
+    ``TARGET_UNIQUE_POSTS`` is reached, so the result is the same whatever
+    order the requests finish in. Listings are fetched one after another
+    (only as many as the target needs) while comment trees are fetched on a
+    thread pool sharing one request budget. With a ``state`` only new
+    submissions are read, every subreddit is scraped with its listings
+    fetched together, and each subreddit's mark is advanced (in memory; the
+    caller saves it).
+
+    Cross-posts and reworded reposts are dropped as near-duplicates of an
+    earlier post in ``dedup`` (a fresh index if none is given).
+    """
+    target = None if state is not None else TARGET_UNIQUE_POSTS
+    dedup = dedup if dedup is not None else NearDuplicateIndex()
+    unique_posts = []
+    seen_titles = set()
+    timings = defaultdict(float)
+    timings_lock = threading.Lock()
+    started = time.perf_counter()
+
+    def timed(subreddit, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            with timings_lock:
+                timings[subreddit] += time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=SCRAPE_WORKERS) as pool:
+        def fetch_listing(subreddit):
+            return pool.submit(timed, subreddit, scrape_subreddit, subreddit, POSTS_PER_SUBREDDIT, state)
+
+        # Without a target every listing is used, so they are all requested
+        # up front; with one, each is requested only if still needed.
+        listings = {subreddit: fetch_listing(subreddit) for subreddit in SUBREDDITS} if target is None else {}
+        comment_jobs = {}
         for subreddit in SUBREDDITS:
-            if len(unique_posts) >= TARGET_UNIQUE_POSTS:
+            if target is not None and len(unique_posts) >= target:
                 break
-            logging.info(f"Scraping subreddit: {subreddit}")
-            subreddit_posts = scrape_subreddit(subreddit, limit=100)
-            for post in subreddit_posts:
-                if post['title'] not in seen_titles:
+            future = listings.get(subreddit) or fetch_listing(subreddit)
+            new_posts = 0
+            listed = future.result()
+            if state is not None:
+                state.advance(subreddit, listed)
+            for post in listed:
+                if post['title'] not in seen_titles and dedup.add_if_new(post['id'], post_text(post)):
                     seen_titles.add(post['title'])
                     unique_posts.append(post)
+                    new_posts += 1
+                    comment_jobs[pool.submit(timed, subreddit, fetch_comments, post['id'])] = post
+            logging.info(f"Scraped subreddit {subreddit}: {new_posts} new unique posts.")
+
+        for future in as_completed(comment_jobs):
+            comment_jobs[future]["comments"] = future.result()
+
+    if target is not None and len(unique_posts) < target:
+        logging.warning(
+            f"Only {len(unique_posts)} unique posts found across {len(SUBREDDITS)} subreddits "
+            f"(target {TARGET_UNIQUE_POSTS})."
+        )
+    for subreddit, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        logging.info(f"  {subreddit}: {seconds:.1f}s")
+    logging.info(
+        f"Scraped {len(unique_posts)} posts in {time.perf_counter() - started:.1f}s, "
+        f"{request_budget.waited:.1f}s spent waiting on the rate limit."
+    )
     return unique_posts
 
+def load_dedup_index(path):
+    """Index the posts of an earlier scrape so reposts of them are skipped."""
+    dedup = NearDuplicateIndex()
+    if os.path.exists(path):
+        for number, post in enumerate(iter_records(path)):
+            dedup.add(post.get('id', number), post_text(post))
+        logging.info(f"Indexed {len(dedup)} earlier posts from {path} for near-duplicate checks.")
+    return dedup
+
+PARAPHRASE_LIMIT = 10
+
 def process_content(posts):
     """Clean and paraphrase content of posts."""
-    for post in posts[:10]: 
-        post["content"] = paraphrase_content(clean_content(post["content"]))
+    selected = posts[:PARAPHRASE_LIMIT]
+    paraphrased = Paraphraser().paraphrase_all([clean_content(post["content"]) for post in selected])
+    for post, content in zip(selected, paraphrased):
+        post["content"] = content
     return posts
 
 def remove_id_fields(data):
@@ -180,17 +269,31 @@ def remove_id_fields(data):
 def main():
     logging.info("Starting Reddit scraper...")
 
-    scraped_posts = scrape_unique_posts()
-    save_data(scraped_posts, OUTPUT_SCRAPED_FILE)
+    state = ScrapeState(SCRAPE_STATE_PATH) if INCREMENTAL_SCRAPE else None
+    append = state is not None
+    # Compare against the raw scraped text; the final files hold paraphrases.
+    # Submissions re-read after a failed run match their own id there and are kept.
+    dedup = load_dedup_index(OUTPUT_SCRAPED_FILE) if append else None
+
+    scraped_posts = scrape_unique_posts(state, dedup)
+    if append and not scraped_posts:
+        logging.info("No new submissions since the last run.")
+        state.save()
+        return
+    save_data(scraped_posts, OUTPUT_SCRAPED_FILE, append)
 
     filtered_posts = filter_posts(scraped_posts)
-    save_data(filtered_posts, FILTERED_DATA_FILE)
+    save_data(filtered_posts, FILTERED_DATA_FILE, append)
 
     cleaned_posts = process_content(filtered_posts)
-    save_data(cleaned_posts, FINAL_CLEANED_FILE)
+    save_data(cleaned_posts, FINAL_CLEANED_FILE, append)
 
     final_posts = remove_id_fields(cleaned_posts)
-    save_data(final_posts, './data/final_posts.json')
+    saved = save_data(final_posts, './data/final_posts.json', append)
+
+    # Only once the dataset is written may later runs skip these submissions.
+    if state is not None and saved:
+        state.save()
 
     logging.info("Scraping and processing completed.")
 
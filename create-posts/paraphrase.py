@@ -0,0 +1,99 @@
+"""Parallel, cached paraphrasing stage of the scraper pipeline.
+
+Cleaned post contents are paraphrased on a bounded thread pool. Every result
+is stored in an on-disk cache keyed by a hash of the model and the cleaned
+text, so reruns only call the model for text they have not seen. Identical
+texts paraphrased at the same time share one call. The model comes from
+``llm_backends.make_backend``, so ``PARAPHRASE_BACKEND=fake`` runs the stage
+offline.
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import APIConnectionError, APIStatusError, RateLimitError
+from tenacity import before_sleep_log, retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from cache import SingleFlight, make_cache
+from llm_backends import make_backend
+
+logger = logging.getLogger(__name__)
+
+PARAPHRASE_MODEL = os.getenv("PARAPHRASE_MODEL", "gpt-4o-mini")
+PARAPHRASE_WORKERS = int(os.getenv("PARAPHRASE_WORKERS", "4"))
+PARAPHRASE_MAX_ATTEMPTS = int(os.getenv("PARAPHRASE_MAX_ATTEMPTS", "5"))
+PARAPHRASE_CACHE_PATH = os.getenv("PARAPHRASE_CACHE_PATH", "./data/paraphrase_cache.sqlite3")
+
+SYSTEM_PROMPT = "You are an assistant that paraphrases text concisely while preserving its original meaning."
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, timeouts, dropped connections and 5xx responses; other errors fail at once."""
+    if isinstance(error, (RateLimitError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+class Paraphraser:
+    def __init__(self, backend=None, cache=None, model: str = PARAPHRASE_MODEL,
+                 workers: int = PARAPHRASE_WORKERS, max_attempts: int = PARAPHRASE_MAX_ATTEMPTS):
+        self.model = model
+        self.workers = workers
+        self.backend = backend or make_backend(
+            os.getenv("PARAPHRASE_BACKEND"), model=model, max_tokens=500, temperature=0.7
+        )
+        # Paraphrases never go stale, so entries only leave the cache through LRU eviction.
+        self.cache = cache or make_cache(
+            "sqlite", path=PARAPHRASE_CACHE_PATH, ttl=10 * 365 * 24 * 3600,
+            max_entries=1_000_000, max_bytes=1024 * 1024 * 1024,
+        )
+        self.inflight = SingleFlight()
+        self.calls = 0
+        self.failures = 0
+        self._invoke = retry(
+            retry=retry_if_exception(is_retryable),
+            stop=stop_after_attempt(max_attempts),
+            wait=wait_random_exponential(multiplier=1, max=30),
+            before_sleep=before_sleep_log(logger, logging.WARNING),
+            reraise=True,
+        )(self.backend.invoke)
+
+    def cache_key(self, content: str) -> str:
+        return hashlib.sha256(f"{self.model}\n{content}".encode()).hexdigest()
+
+    def paraphrase(self, content: str) -> str:
+        """Return the paraphrase of ``content``, or ``content`` itself if the model keeps failing."""
+        if not content:
+            return content
+        key = self.cache_key(content)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        return self.inflight.do(key, lambda: self._call(key, content))
+
+    def _call(self, key: str, content: str) -> str:
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Paraphrase the following text:\n\n{content}"},
+        ]
+        self.calls += 1
+        try:
+            result = self._invoke(messages).strip()
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Error during paraphrasing: {e}")
+            return content
+        self.cache.set(key, result)
+        return result
+
+    def paraphrase_all(self, contents: list) -> list:
+        """Paraphrase ``contents`` in parallel, keeping their order."""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(self.paraphrase, contents))
+        stats = self.cache.stats()
+        logger.info(
+            f"Paraphrased {len(contents)} texts: {self.calls} model calls, {self.failures} failed, "
+            f"{stats['hits']} cache hits."
+        )
+        return results
@@ -0,0 +1,49 @@
+import json
+import logging
+import os
+from datetime import datetime
+
+
+class ScrapeState:
+    """Newest submission seen per subreddit, kept in a small JSON file.
+
+    Incremental runs stop reading a subreddit's ``new`` listing at its mark.
+    Marks are saved only after a run has written its output, so a crashed run
+    fetches the same submissions again instead of skipping them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.marks = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    self.marks = json.load(file)
+            except (OSError, json.JSONDecodeError) as e:
+                logging.error(f"Ignoring unreadable scrape state {path}: {e}")
+
+    def get(self, subreddit: str):
+        """Return ``{"id", "created_utc"}`` for the newest submission seen, or None."""
+        return self.marks.get(subreddit)
+
+    def is_seen(self, subreddit: str, submission_id: str, created_utc: float) -> bool:
+        mark = self.get(subreddit)
+        if mark is None:
+            return False
+        return submission_id == mark["id"] or created_utc <= mark["created_utc"]
+
+    def advance(self, subreddit: str, posts: list) -> None:
+        """Move the mark to the newest of ``posts`` (scraped post dicts)."""
+        for post in posts:
+            created_utc = datetime.fromisoformat(post["created_at"]).timestamp()
+            mark = self.get(subreddit)
+            if mark is None or created_utc > mark["created_utc"]:
+                self.marks[subreddit] = {"id": post["id"], "created_utc": created_utc}
+
+    def save(self) -> None:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self.marks, file, indent=4, sort_keys=True)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,178 @@
+"""Near-duplicate detection for posts with MinHash and LSH banding.
+
+Each post's title and content are split into word shingles. A MinHash
+signature is built with one-permutation hashing: every shingle is hashed
+once and only the smallest hash per bin is kept. Empty bins are filled from
+the next non-empty bin (densification). Signature cost therefore grows with
+the text length, not with ``num_perm``. Signatures are cut into bands, and
+posts sharing any band are candidates. The banding is chosen so that a pair
+at ``threshold`` becomes a candidate with high probability. Signature
+estimates are noisy for short posts, so each candidate is then checked
+against the exact Jaccard similarity of the shingles, which are kept as a
+sorted array of 32-bit hashes (about 4 bytes per shingle). Adding and
+querying cost about the same for every post, so deduplicating ``n`` posts
+is close to linear in ``n``.
+"""
+import os
+import re
+import zlib
+from array import array
+
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.7"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "3"))
+# Probability that a pair exactly at the threshold shares at least one band.
+DEDUP_RECALL = 0.95
+
+_WORD = re.compile(r"\w+")
+_EMPTY = 0xFFFFFFFF
+
+
+def post_text(post: dict) -> str:
+    return f"{post.get('title') or ''}\n{post.get('content') or ''}"
+
+
+def shingles(text: str, size: int = DEDUP_SHINGLE_SIZE) -> set:
+    """Hashed word ``size``-grams of ``text``; texts shorter than ``size`` words form one shingle."""
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode())} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)}
+
+
+def lsh_params(threshold: float, num_perm: int, recall: float = DEDUP_RECALL) -> tuple:
+    """Pick ``(bands, rows)`` with the most rows per band that still reaches ``recall`` at ``threshold``.
+
+    A pair with similarity ``s`` shares a band with probability
+    ``1 - (1 - s ** rows) ** bands``. More rows mean fewer dissimilar
+    candidates to verify, so the longest band meeting ``recall`` is used.
+    """
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+def jaccard(a: set, b) -> float:
+    """Jaccard similarity of a shingle set and another set or array of distinct shingles."""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b) if isinstance(b, (set, frozenset)) else sum(1 for h in b if h in a)
+    return shared / (len(a) + len(b) - shared)
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = DEDUP_NUM_PERM,
+                 shingle_size: int = DEDUP_SHINGLE_SIZE):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self.shingles = {}
+        self.buckets = [{} for _ in range(self.bands)]
+
+    def __len__(self):
+        return len(self.shingles)
+
+    def signature(self, hashes: set) -> array:
+        """One-permutation MinHash signature of a non-empty shingle set."""
+        num_perm = self.num_perm
+        bins = [_EMPTY] * num_perm
+        for h in hashes:
+            # Scramble the CRC so bin and value don't share low bits.
+            h = (h * 0x9E3779B1) & 0xFFFFFFFF
+            slot = h % num_perm
+            value = h // num_perm
+            if value < bins[slot]:
+                bins[slot] = value
+        if _EMPTY in bins:
+            self._densify(bins)
+        return array("I", bins)
+
+    def _densify(self, bins: list) -> None:
+        """Fill each empty bin from the next non-empty one to its right, offset by the distance."""
+        num_perm = len(bins)
+        filled = list(bins)
+        donor = None
+        distance = 0
+        # Walk right to left twice so bins near the end can borrow across the wrap.
+        for step in range(2 * num_perm - 1, -1, -1):
+            i = step % num_perm
+            if filled[i] != _EMPTY:
+                donor = filled[i]
+                distance = 0
+                continue
+            distance += 1
+            if step < num_perm and donor is not None:
+                bins[i] = (donor + distance * 0x01000193) & 0x7FFFFFFF
+
+    def _band_keys(self, signature) -> list:
+        rows = self.rows
+        return [hash(signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+    def _candidates(self, signature) -> set:
+        candidates = set()
+        for band, band_key in enumerate(self._band_keys(signature)):
+            members = self.buckets[band].get(band_key)
+            if isinstance(members, list):
+                candidates.update(members)
+            elif members is not None:
+                candidates.add(members)
+        return candidates
+
+    def _matches(self, hashes: set, signature) -> list:
+        matches = []
+        size = len(hashes)
+        for candidate in self._candidates(signature):
+            stored = self.shingles[candidate]
+            # Jaccard similarity can't exceed the ratio of the two set sizes.
+            if min(size, len(stored)) < self.threshold * max(size, len(stored)):
+                continue
+            score = jaccard(hashes, stored)
+            if score >= self.threshold:
+                matches.append((candidate, score))
+        return sorted(matches, key=lambda match: -match[1])
+
+    def _add(self, key, hashes: set, signature) -> None:
+        # A sorted array of 32-bit hashes takes 4 bytes per shingle, a set ~60.
+        self.shingles[key] = array("I", sorted(hashes))
+        for band, band_key in enumerate(self._band_keys(signature)):
+            # Most buckets hold one post, stored bare rather than in a list.
+            bucket = self.buckets[band]
+            members = bucket.get(band_key)
+            if members is None:
+                bucket[band_key] = key
+            elif isinstance(members, list):
+                members.append(key)
+            else:
+                bucket[band_key] = [members, key]
+
+    def query(self, text: str) -> list:
+        """``(key, similarity)`` of indexed posts at or above the threshold, most similar first."""
+        hashes = shingles(text, self.shingle_size)
+        if not hashes:
+            return []
+        return self._matches(hashes, self.signature(hashes))
+
+    def add(self, key, text: str) -> None:
+        """Index ``text`` under ``key``; texts without words and known keys are ignored."""
+        hashes = shingles(text, self.shingle_size)
+        if hashes and key not in self.shingles:
+            self._add(key, hashes, self.signature(hashes))
+
+    def add_if_new(self, key, text: str) -> bool:
+        """Index ``text`` unless it near-duplicates an indexed post; True if it was new.
+
+        A post already indexed under ``key`` (a submission read again after a
+        failed run) is not a duplicate of itself.
+        """
+        hashes = shingles(text, self.shingle_size)
+        if not hashes:
+            return True
+        signature = self.signature(hashes)
+        if any(match != key for match, _ in self._matches(hashes, signature)):
+            return False
+        if key not in self.shingles:
+            self._add(key, hashes, signature)
+        return True
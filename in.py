@@ -69,6 +69,10 @@
 
 
 import json
+from itertools import chain
+
+from dedup import NearDuplicateIndex, post_text
+from json_stream import iter_records, write_records
 
 # File paths
 FILE_CURRENT = "./temp/new.json"  # Path to the current data file
@@ -76,59 +80,70 @@ FILE_OLD = "./temp/old.json"  # Path to the old data file
 OUTPUT_FILE = "./temp/final_posts.json"  # Path for the final output file
 
 def load_json(file_path):
-    """Load JSON data from a file."""
+    """Stream records one at a time from a JSON array or JSONL file."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-            print(f"Loaded {len(data)} records from {file_path}")
-            return data
+        yield from iter_records(file_path)
     except FileNotFoundError:
         print(f"File not found: {file_path}")
-        return []
     except json.JSONDecodeError as e:
         print(f"Invalid JSON format in file {file_path}: {e}")
-        return []
 
 def save_json(data, file_path):
-    """Save JSON data to a file."""
+    """Stream records to a JSON array or JSONL file."""
     try:
-        with open(file_path, 'w', encoding='utf-8') as file:
-            json.dump(data, file, indent=4)
-        print(f"Data saved to {file_path}. Total records: {len(data)}")
+        count = write_records(file_path, data)
+        print(f"Data saved to {file_path}. Total records: {count}")
     except Exception as e:
         print(f"Error saving file {file_path}: {e}")
 
-def filter_new_posts(current_data, old_data):
-    """Filter out posts from current_data if their title exists in old_data."""
-    old_titles = {post.get("title", "").strip().lower() for post in old_data}
-    filtered_posts = [post for post in current_data if post.get("title", "").strip().lower() not in old_titles]
-    return filtered_posts
+def normalize_title(post):
+    return post.get("title", "").strip().lower()
+
+def filter_new_posts(current_data, old_titles, index=None):
+    """Filter out posts from current_data whose title is in old_titles.
+
+    With a NearDuplicateIndex, posts whose text nearly matches an old post or
+    an earlier new post are dropped as well; kept posts are added to it.
+    """
+    for number, post in enumerate(current_data):
+        if normalize_title(post) in old_titles:
+            continue
+        if index is not None and not index.add_if_new(("new", number), post_text(post)):
+            continue
+        yield post
 
 def remove_id_fields(data):
     """Remove 'id' and '_id' fields from each post."""
     for post in data:
-        if 'id' in post:
-            del post['id']
-        if '_id' in post:
-            del post['_id']
-    return data
+        post.pop('id', None)
+        post.pop('_id', None)
+        yield post
 
 def main():
-    # Load data from both files
     current_data = load_json(FILE_CURRENT)
-    old_data = load_json(FILE_OLD)
+    first = next(current_data, None)
 
-    if not current_data:
+    if first is None:
         print("No new data to process. Exiting.")
         return
-
-    if not old_data:
-        print("No old data found. All new data will be saved.")
-        save_json(current_data, OUTPUT_FILE)
+    current_data = chain([first], current_data)
+
+    # Only the old titles and a compact array of hashed shingles per old post
+    # are kept in memory, never the old posts themselves.
+    old_titles = set()
+    index = NearDuplicateIndex()
+    for number, post in enumerate(load_json(FILE_OLD)):
+        old_titles.add(normalize_title(post))
+        index.add(("old", number), post_text(post))
+    print(f"Loaded {len(old_titles)} old titles from {FILE_OLD}")
+
+    if not old_titles:
+        print("No old data found. Only near-duplicates within the new data will be dropped.")
+        save_json(filter_new_posts(current_data, old_titles, index), OUTPUT_FILE)
         return
 
-    # Filter out old titles from the new data
-    filtered_data = filter_new_posts(current_data, old_data)
+    # Filter out old titles and near-duplicate posts from the new data
+    filtered_data = filter_new_posts(current_data, old_titles, index)
 
     # Save the final data to a new file
 
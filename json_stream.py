@@ -0,0 +1,149 @@
+"""Incremental readers and writers for post dumps.
+
+Dumps are either one JSON array of records (``.json``) or one record per
+line (``.jsonl``). Readers yield records one at a time while reading the file
+in fixed-size chunks, so memory stays bounded by the largest single record
+and processing starts on the first one. Writers stream records out the same
+way; the array writer produces the same bytes as ``json.dump(records, f,
+indent=4)``, and ``append_records`` extends an existing dump.
+"""
+import json
+import os
+import re
+import textwrap
+from itertools import chain
+
+CHUNK_SIZE = 64 * 1024
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_NUMBER_END = re.compile(r"[^0-9eE+\-.]")
+
+
+def iter_json_array(file, chunk_size: int = CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array from a text file object."""
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = file.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if buffer[pos:pos + 1] != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+
+    skip_whitespace()
+    if buffer[pos:pos + 1] == "]":
+        return
+
+    while True:
+        skip_whitespace()
+        try:
+            value, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        # A number cut off by the chunk boundary decodes as a shorter number.
+        if isinstance(value, (int, float)) and not eof and not _NUMBER_END.search(buffer, end):
+            fill()
+            continue
+        pos = end
+        yield value
+
+        skip_whitespace()
+        separator = buffer[pos:pos + 1]
+        pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or ']' in JSON array, got {separator!r}")
+
+
+def iter_jsonl(file):
+    """Yield one record per non-blank line."""
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def is_jsonl(path: str) -> bool:
+    return path.lower().endswith(JSONL_EXTENSIONS)
+
+
+def iter_records(path: str):
+    """Yield records from a ``.json`` array or ``.jsonl`` file, one at a time."""
+    with open(path, "r", encoding="utf-8") as file:
+        if is_jsonl(path):
+            yield from iter_jsonl(file)
+        else:
+            yield from iter_json_array(file)
+
+
+def write_records(path: str, records) -> int:
+    """Stream ``records`` to ``path`` as a JSON array or JSONL; returns the count."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    count = 0
+    with open(path, "w", encoding="utf-8") as file:
+        if is_jsonl(path):
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+            return count
+
+        for record in records:
+            file.write(",\n" if count else "[\n")
+            file.write(textwrap.indent(json.dumps(record, indent=4), "    "))
+            count += 1
+        file.write("\n]" if count else "[]")
+    return count
+
+
+def append_records(path: str, records) -> int:
+    """Add ``records`` to the end of a dump; returns how many were added.
+
+    JSONL files are appended in place. A JSON array is streamed, with the new
+    records after the existing ones, into a temporary file that then replaces
+    the original, so an interrupted append never leaves a truncated array.
+    """
+    if not os.path.exists(path):
+        return write_records(path, records)
+    if is_jsonl(path):
+        count = 0
+        with open(path, "a", encoding="utf-8") as file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+        return count
+
+    added = 0
+
+    def new_records():
+        nonlocal added
+        for record in records:
+            added += 1
+            yield record
+
+    temp_path = f"{path}.tmp"
+    write_records(temp_path, chain(iter_records(path), new_records()))
+    os.replace(temp_path, path)
+    return added
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import httpx
+
+
+class LLMBackend(ABC):
+    """Chat completion backend taking OpenAI-style ``messages`` lists."""
+
+    @abstractmethod
+    def invoke(self, messages: list) -> str:
+        """Return the full completion text."""
+
+    def stream(self, messages: list):
+        """Yield the completion in chunks; backends without streaming yield it whole."""
+        yield self.invoke(messages)
+
+
+class OpenAIBackend(LLMBackend):
+    """Calls OpenAI through one long-lived LangChain client with pooled connections."""
+
+    def __init__(self, model: str = "gpt-4o", max_connections: int = 20, **kwargs):
+        from langchain_openai import ChatOpenAI
+
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.model = model
+        self.client = ChatOpenAI(model=model, http_client=httpx.Client(limits=limits), **kwargs)
+
+    def invoke(self, messages: list) -> str:
+        return self.client.invoke(messages).content
+
+    def stream(self, messages: list):
+        for chunk in self.client.stream(messages):
+            if chunk.content:
+                yield chunk.content
+
+
+class FakeBackend(LLMBackend):
+    """Deterministic offline backend for load tests.
+
+    It answers with the chatbot's JSON shape, citing the first posts found in
+    the ``Post_Data`` message. Conversations without post data (such as the
+    scraper's paraphrasing) get the last user message echoed back. It waits ``latency`` seconds before the first
+    token and then emits roughly ``tokens_per_second`` four-character tokens
+    per second.
+    """
+
+    def __init__(self, latency: float = 0.5, tokens_per_second: float = 50, max_related: int = 3):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.max_related = max_related
+
+    def _answer(self, messages: list) -> str:
+        posts = None
+        question = ""
+        for message in messages:
+            content = message["content"]
+            if content.startswith("Post_Data ="):
+                posts = json.loads(content[len("Post_Data ="):]).get("posts", [])
+            elif message["role"] == "user":
+                question = content
+        if posts is None:
+            return question
+        related = [{"title": post["title"], "id": post["id"]} for post in posts[: self.max_related]]
+        answer = f"Based on {len(posts)} related discussions, here is what the community says about: {question}"
+        return json.dumps({"content": answer, "related_posts": related})
+
+    def _chunks(self, text: str):
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    def invoke(self, messages: list) -> str:
+        text = self._answer(messages)
+        time.sleep(self.latency + len(self._chunks(text)) / self.tokens_per_second)
+        return text
+
+    def stream(self, messages: list):
+        text = self._answer(messages)
+        time.sleep(self.latency)
+        for chunk in self._chunks(text):
+            time.sleep(1 / self.tokens_per_second)
+            yield chunk
+
+
+class ReplayBackend(LLMBackend):
+    """Records completions to disk, or serves previously recorded ones.
+
+    Recordings are keyed by a hash of the messages, one JSON file each under
+    ``directory``. In ``record`` mode misses are sent to ``inner`` and saved;
+    in ``replay`` mode a miss raises ``KeyError`` so no network call is made.
+    """
+
+    def __init__(self, directory: str, mode: str = "replay", inner: LLMBackend = None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown replay mode: {mode}")
+        if mode == "record" and inner is None:
+            raise ValueError("Record mode needs an inner backend to call.")
+        self.directory = directory
+        self.mode = mode
+        self.inner = inner
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, messages: list) -> str:
+        key = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    def invoke(self, messages: list) -> str:
+        path = self._path(messages)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                return json.load(file)["response"]
+        if self.mode == "replay":
+            raise KeyError(f"No recorded response for these messages ({os.path.basename(path)}).")
+        response = self.inner.invoke(messages)
+        with self._lock:
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump({"messages": messages, "response": response}, file, indent=4)
+        return response
+
+
+def make_backend(name: str = None, **kwargs) -> LLMBackend:
+    """Build the backend named by ``name`` or the ``LLM_BACKEND`` setting.
+
+    ``openai`` (default), ``fake``, ``record`` and ``replay`` are supported.
+    Extra keyword arguments are passed to the OpenAI client.
+    """
+    name = name or os.getenv("LLM_BACKEND", "openai")
+    max_connections = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    if name == "openai":
+        return OpenAIBackend(max_connections=max_connections, **kwargs)
+    if name == "fake":
+        return FakeBackend(
+            latency=float(os.getenv("LLM_FAKE_LATENCY", "0.5")),
+            tokens_per_second=float(os.getenv("LLM_FAKE_TOKENS_PER_SECOND", "50")),
+        )
+    if name in ("record", "replay"):
+        inner = OpenAIBackend(max_connections=max_connections, **kwargs) if name == "record" else None
+        return ReplayBackend(os.getenv("LLM_REPLAY_DIR", "./data/llm_recordings"), mode=name, inner=inner)
+    raise ValueError(f"Unknown LLM backend: {name}")
@@ -1,17 +1,56 @@
 import json
-from fastapi import FastAPI, Request, HTTPException, Depends, status
+import logging
+from itertools import islice
+from typing import Any, List, Optional
+import orjson
+from fastapi import Body, FastAPI, Request, Response, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sql_app.models import Post, Comment
-from sql_app.schemas import CommentBase, PostBase, QuestionBase
-from sql_app.database import engine, get_db, Base
+from sql_app.schemas import (
+    AllPosts,
+    BulkDeleteIn,
+    BulkDeleteOut,
+    BulkUploadOut,
+    CommentBase,
+    CommentOut,
+    LikeOut,
+    MessageOut,
+    PostBase,
+    PostDetail,
+    PostPage,
+    QuestionBase,
+)
+from sql_app.pagination import SORT_COLUMNS, InvalidCursor, order_posts, paginate
+from sql_app.search import apply_search
+from sql_app.counts import post_counter
+from sql_app.projections import list_query, summarize
+from sql_app.post_cache import post_cache
+from sql_app.bulk import BULK_MAX_ITEMS, delete_posts, insert_posts, matching_post_ids
+from sql_app import votes
+from sql_app.votes import vote_aggregator
+from sql_app.conditional import (
+    is_not_modified,
+    list_etag,
+    not_modified,
+    post_etag,
+    bump_feed,
+    feed_state,
+    touch_post,
+    validator_headers,
+)
+from sql_app.database import engine, get_db, Base, SessionLocal
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from chatbot import LLM
+from chatbot import LLM, LLM_stream, answer_cache, ensure_index, inflight
 from openai import RateLimitError
+from search_index import post_index
+
+logger = logging.getLogger(__name__)
 
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,63 +61,115 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+def load_search_index():
+    db = SessionLocal()
+    try:
+        post_index.load(db)
+    except SQLAlchemyError as e:
+        logger.error(f"Could not load search index, it will load on first use: {e}")
+    finally:
+        db.close()
+    post_index.start_compactor()
+    if vote_aggregator:
+        vote_aggregator.start()
+
+
+@app.on_event("shutdown")
+def stop_search_index():
+    post_index.stop_compactor()
+    if vote_aggregator:
+        vote_aggregator.stop()
+
+
 @app.get("/healthcheck")
 def healthcheck(request: Request):
     return {
         "message": " Server is up and running",
         "domain": request.url.hostname,
+        "corpus_version": post_index.content_version,
+        "answer_cache": answer_cache.stats(),
+        "post_cache": post_cache.stats(),
+        "coalesced_questions": inflight.shared,
+        "pending_votes": vote_aggregator.pending() if vote_aggregator else 0,
     }
 
 
-@app.get("/get_posts/")
+@app.get("/get_posts/", response_model=PostPage)
 def get_posts(
     search: str = "",
     sort_by: str = "created_at",  
     limit: int = 10,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    view: str = "summary",
+    request: Request = None,
+    response: Response = None,
     db=Depends(get_db),
 ):
-    if sort_by not in [
-        "created_at",
-        "upvotes",
-        "title",
-        "category",
-    ]:
+    if sort_by not in SORT_COLUMNS and sort_by != "relevance":
+        sort_by = "created_at"
+    # Without a search there is no rank, so relevance falls back to a stable order.
+    if sort_by == "relevance" and not search:
         sort_by = "created_at"
 
-    query = db.query(Post)
+    version, content_version = feed_state(db)
+    etag = list_etag(version, "get_posts", search, sort_by, limit, offset, cursor, view)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    response.headers.update(validator_headers(etag))
+
+    query = list_query(db, view)
 
     if search:
-        query = query.filter(Post.title.ilike(f"%{search}%"))
+        query, rank = apply_search(query, search)
 
-    if sort_by == "created_at":
-        query = query.order_by(Post.created_at.desc())
-    elif sort_by == "likes":
-        query = query.order_by(Post.upvotes.desc())
-    elif sort_by == "title":
-        query = query.order_by(Post.title.asc())
+    if sort_by == "relevance":
+        # Relevance ranks aren't stable between writes, so no cursor here.
+        posts = query.order_by(rank, Post.id).limit(limit).offset(offset).all()
+        next_cursor = None
+    else:
+        try:
+            posts, next_cursor = paginate(query, sort_by, limit, offset, cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    posts = query.limit(limit).offset(offset).all()
+    if view == "full":
+        posts = [PostDetail.model_validate(post) for post in posts]
+    else:
+        posts = summarize(db, posts)
 
-    total_posts = db.query(Post).count()
+    total_posts, total_is_estimate = post_counter.count(db, content_version, search)
 
     return {
         "posts": posts,
         "total_posts": total_posts,
+        "total_is_estimate": total_is_estimate,
         "limit": limit,
         "offset": offset,
+        "next_cursor": next_cursor,
     }
 
 
-@app.post("/upload_post/", status_code=status.HTTP_201_CREATED)
+@app.post("/upload_post/", status_code=status.HTTP_201_CREATED, response_model=PostDetail)
 def upload_post(post: PostBase, db=Depends(get_db)):
     try:
         post_data = post.model_dump()  
+        comments = post_data.pop("comments")
         db_post = Post(**post_data)
+        db_post.comments = [Comment(**comment) for comment in comments]
 
         db.add(db_post)
+        content_version = bump_feed(db, content=True)
         db.commit()
         db.refresh(db_post)
+        post_index.upsert(
+            db_post.id,
+            db_post.title,
+            db_post.content,
+            {comment.id: comment.content for comment in db_post.comments},
+        )
+        post_index.mark_synced(content_version)
 
         return db_post
     except SQLAlchemyError as e:
@@ -94,12 +185,45 @@ def upload_post(post: PostBase, db=Depends(get_db)):
         )
 
 
-@app.get("/get_post/{post_id}")
-def get_post(post_id: str, db=Depends(get_db)):
+@app.post("/upload_posts/bulk", status_code=status.HTTP_201_CREATED, response_model=BulkUploadOut)
+def upload_posts_bulk(posts: List[Any] = Body(...), db=Depends(get_db)):
+    # Items are validated one by one so a bad item is reported instead of
+    # rejecting the whole batch.
+    if len(posts) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_MAX_ITEMS} posts per request.",
+        )
+    results, inserted, content_versions = insert_posts(db, posts)
+    for post_row, comment_rows in inserted:
+        post_index.upsert(
+            post_row["id"],
+            post_row["title"],
+            post_row["content"],
+            {row["id"]: row["content"] for row in comment_rows},
+        )
+    for content_version in content_versions:
+        post_index.mark_synced(content_version)
+    existing = sum(result["existing"] for result in results)
+    return {
+        "created": len(inserted),
+        "existing": existing,
+        "failed": len(results) - len(inserted) - existing,
+        "results": results,
+    }
+
+
+@app.get("/get_post/{post_id}", response_model=PostDetail)
+def get_post(post_id: str, request: Request, db=Depends(get_db)):
     try:
-        post = db.query(Post).filter(Post.id == post_id).first()
-        if post:
-            return post
+        cached = post_cache.get_post(db, post_id)
+        if cached:
+            etag = post_etag(post_id, cached["version"])
+            last_modified = cached["updated_at"]
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified)
+            # The cached body is already serialized, so skip response_model validation.
+            return ORJSONResponse(cached["body"], headers=validator_headers(etag, last_modified))
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Post not found."
         )
@@ -116,12 +240,12 @@ def get_post(post_id: str, db=Depends(get_db)):
         )
 
 
-@app.get("/get_comment/{comment_id}")
+@app.get("/get_comment/{comment_id}", response_model=CommentOut)
 def get_post(comment_id: str, db=Depends(get_db)):
     try:
-        comment = db.query(Comment).filter(Comment.id == comment_id).first()
+        comment = post_cache.get_comment(db, comment_id)
         if comment:
-            return comment
+            return ORJSONResponse(comment)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found."
         )
@@ -138,17 +262,20 @@ def get_post(comment_id: str, db=Depends(get_db)):
         )
 
 
-@app.get("/like_post/{post_id}")
+@app.get("/like_post/{post_id}", response_model=LikeOut)
 def like_post(post_id: str, db=Depends(get_db)):
     try:
-        post = db.query(Post).filter(Post.id == post_id).first()
-        if post:
-            post.upvotes += 1
+        if vote_aggregator:
+            upvotes = vote_aggregator.like_post(db, post_id)
+        else:
+            upvotes = votes.like_post(db, post_id)
             db.commit()
-            db.refresh(post)
+            if upvotes is not None:
+                post_cache.invalidate(post_id)
+        if upvotes is not None:
             return {
                 "message": "Post liked successfully",
-                "upvotes": post.upvotes,
+                "upvotes": upvotes,
             }
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Post not found."
@@ -167,13 +294,12 @@ def like_post(post_id: str, db=Depends(get_db)):
         )
 
 
-@app.delete("/delete_post/{post_id}")
+@app.delete("/delete_post/{post_id}", response_model=MessageOut)
 def delete_post(post_id: str, db=Depends(get_db)):
     try:
-        post = db.query(Post).filter(Post.id == post_id).first()
-        if post:
-            db.delete(post)
-            db.commit()
+        deleted, content_version = delete_posts(db, [post_id])
+        if deleted:
+            forget_posts(deleted, content_version)
             return {"message": "Post deleted successfully"}
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Post not found."
@@ -192,7 +318,42 @@ def delete_post(post_id: str, db=Depends(get_db)):
         )
 
 
-@app.post("/upload_comment/{post_id}")
+@app.delete("/delete_posts/bulk", response_model=BulkDeleteOut)
+def delete_posts_bulk(criteria: BulkDeleteIn, db=Depends(get_db)):
+    filters = criteria.model_dump(exclude_none=True)
+    if not filters:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give ids or at least one filter.",
+        )
+    blank = [name for name, value in filters.items() if value == ""]
+    if blank:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Filters must not be blank: {', '.join(blank)}.",
+        )
+    try:
+        deleted, content_version = delete_posts(db, matching_post_ids(db, **filters))
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred.",
+        )
+    forget_posts(deleted, content_version)
+    return {"deleted": len(deleted), "ids": list(deleted)}
+
+
+def forget_posts(deleted: dict, content_version) -> None:
+    """Drop deleted posts (id -> comment ids) from the caches and search index."""
+    for post_id, comment_ids in deleted.items():
+        post_cache.invalidate(post_id, comment_ids)
+        post_index.remove(post_id)
+    if content_version is not None:
+        post_index.mark_synced(content_version)
+
+
+@app.post("/upload_comment/{post_id}", response_model=CommentOut)
 def upload_comment(post_id: str, comment: CommentBase, db: Session = Depends(get_db)):
     try:
         comment_data = comment.model_dump()  
@@ -200,8 +361,12 @@ def upload_comment(post_id: str, comment: CommentBase, db: Session = Depends(get
         db_comment = Comment(**comment_data)
 
         db.add(db_comment)
+        content_version = touch_post(db, post_id, content=True)
         db.commit()
         db.refresh(db_comment)
+        post_cache.invalidate(post_id)
+        post_index.add_comment(post_id, db_comment.id, db_comment.content)
+        post_index.mark_synced(content_version)
 
         return db_comment
     except SQLAlchemyError as e:
@@ -217,20 +382,22 @@ def upload_comment(post_id: str, comment: CommentBase, db: Session = Depends(get
         )
 
 
-@app.get("/like_comment/{post_id}/{comment_id}")
+@app.get("/like_comment/{post_id}/{comment_id}", response_model=LikeOut)
 def like_comment(post_id: str, comment_id: str, db=Depends(get_db)):
     try:
-        comment = (
-            db.query(Comment)
-            .filter(Comment.id == comment_id, Comment.post_id == post_id)
-            .first()
-        )
-        if comment:
-            comment.upvotes += 1
+        if vote_aggregator:
+            upvotes = vote_aggregator.like_comment(db, post_id, comment_id)
+        else:
+            upvotes = votes.like_comment(db, post_id, comment_id)
+            if upvotes is not None:
+                touch_post(db, post_id)
             db.commit()
-            db.refresh(comment)
+            if upvotes is not None:
+                post_cache.invalidate(post_id, [comment_id])
+        if upvotes is not None:
             return {
                 "message": "Comment liked successfully",
+                "upvotes": upvotes,
             }
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found."
@@ -248,7 +415,7 @@ def like_comment(post_id: str, comment_id: str, db=Depends(get_db)):
         )
 
 
-@app.delete("/delete_comment/{post_id}/{comment_id}")
+@app.delete("/delete_comment/{post_id}/{comment_id}", response_model=MessageOut)
 def delete_comment(post_id: str, comment_id: str, db=Depends(get_db)):
     try:
         comment = (
@@ -258,7 +425,11 @@ def delete_comment(post_id: str, comment_id: str, db=Depends(get_db)):
         )
         if comment:
             db.delete(comment)
+            content_version = touch_post(db, post_id, content=True)
             db.commit()
+            post_cache.invalidate(post_id, [comment_id])
+            post_index.remove_comment(post_id, comment_id)
+            post_index.mark_synced(content_version)
             return {"message": "Comment deleted successfully"}
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found."
@@ -278,23 +449,27 @@ def delete_comment(post_id: str, comment_id: str, db=Depends(get_db)):
         )
 
 
+def add_post_urls(response: dict, request: Request) -> dict:
+    """Point each related post at its /get_post/ URL on this server."""
+    for post in response.get("related_posts", None) or []:
+        if post["id"]:
+            PORT = request.url.port
+            if PORT:
+                post["url"] = (
+                    f"{request.url.scheme}://{request.url.hostname}:{PORT}/get_post/{post['id']}"
+                )
+            else:
+                post["url"] = (
+                    f"{request.url.scheme}://{request.url.hostname}/get_post/{post['id']}"
+                )
+    return response
+
+
 @app.post("/AI_bot/")
 def AI_bot(question: QuestionBase, request: Request, db: Session = Depends(get_db)):
     response = LLM(question.question, db)
     try:
-        if response.get("related_posts", None):
-            for post in response.get("related_posts", []):
-                if post["id"]:
-                    PORT = request.url.port
-                    if PORT:
-                        post["url"] = (
-                            f"{request.url.scheme}://{request.url.hostname}:{PORT}/get_post/{post['id']}"
-                        )
-                    else:
-                        post["url"] = (
-                            f"{request.url.scheme}://{request.url.hostname}/get_post/{post['id']}"
-                        )
-        return response
+        return add_post_urls(response, request)
     except json.JSONDecodeError as e:
         raise HTTPException(
             status_code=500, detail=f"Invalid JSON response from LLM: {str(e)}"
@@ -305,31 +480,116 @@ def AI_bot(question: QuestionBase, request: Request, db: Session = Depends(get_d
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/get_all_posts/")
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/AI_bot/stream")
+def AI_bot_stream(question: QuestionBase, request: Request, db: Session = Depends(get_db)):
+    error = ensure_index(db)
+    if error:
+        raise HTTPException(status_code=500, detail=error["error"])
+    # Read while the session is open; the generator runs after the response starts.
+    version = post_index.content_version
+
+    def events():
+        for kind, payload in LLM_stream(question.question, version):
+            if kind == "token":
+                yield sse_event("token", {"content": payload})
+            elif payload.get("error"):
+                yield sse_event("error", payload)
+            else:
+                try:
+                    yield sse_event("done", add_post_urls(payload, request))
+                except Exception as e:
+                    yield sse_event("error", {"error": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/get_all_posts/", response_model=AllPosts)
 def get_all_posts(
     search: str = "",
     sort_by: str = "created_at",  
+    view: str = "summary",
+    request: Request = None,
+    response: Response = None,
     db: Session = Depends(get_db),
 ):
-    valid_sort_fields = ["created_at", "upvotes", "title"]
+    valid_sort_fields = ["created_at", "upvotes", "title", "relevance"]
     if sort_by not in valid_sort_fields:
         sort_by = "created_at"
+    # Without a search there is no rank, so relevance falls back to a stable order.
+    if sort_by == "relevance" and not search:
+        sort_by = "created_at"
 
-    query = db.query(Post)
+    etag = list_etag(feed_state(db)[0], "get_all_posts", search, sort_by, view)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    response.headers.update(validator_headers(etag))
+
+    query = list_query(db, view)
 
     if search:
-        query = query.filter(Post.title.ilike(f"%{search}%"))
+        query, rank = apply_search(query, search)
 
-    if sort_by == "created_at":
-        query = query.order_by(Post.created_at.desc())
-    elif sort_by == "upvotes":
-        query = query.order_by(Post.upvotes.desc())
-    elif sort_by == "title":
-        query = query.order_by(Post.title.asc())
+    if sort_by == "relevance":
+        posts = query.order_by(rank, Post.id).all()
+    else:
+        posts = order_posts(query, sort_by).all()
 
-    posts = query.all()
+    if view == "full":
+        posts = [PostDetail.model_validate(post) for post in posts]
+    else:
+        posts = summarize(db, posts, all_posts=not search)
 
     return {
         "posts": posts,  
         "total_posts": len(posts),
-    }
\ No newline at end of file
+    }
+
+
+STREAM_BATCH_SIZE = 500
+
+
+@app.get("/get_all_posts/stream")
+def stream_all_posts(search: str = "", sort_by: str = "created_at"):
+    """Stream every post summary as newline-delimited JSON.
+
+    Rows are read in batches through a server-side cursor, so memory stays flat
+    however large the table is and the first lines go out immediately.
+    """
+    valid_sort_fields = ["created_at", "upvotes", "title", "relevance"]
+    if sort_by not in valid_sort_fields:
+        sort_by = "created_at"
+    # Without a search there is no rank, so relevance falls back to a stable order.
+    if sort_by == "relevance" and not search:
+        sort_by = "created_at"
+
+    def lines():
+        # The request's get_db session is closed before a streaming body is
+        # sent, so the generator owns its own session.
+        db = SessionLocal()
+        try:
+            query = list_query(db, "summary")
+            if search:
+                query, rank = apply_search(query, search)
+            if sort_by == "relevance":
+                query = query.order_by(rank, Post.id)
+            else:
+                query = order_posts(query, sort_by)
+
+            rows = iter(query.yield_per(STREAM_BATCH_SIZE))
+            while True:
+                batch = list(islice(rows, STREAM_BATCH_SIZE))
+                if not batch:
+                    break
+                yield b"".join(orjson.dumps(post) + b"\n" for post in summarize(db, batch))
+        finally:
+            db.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -23,6 +23,15 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 config.set_main_option("sqlalchemy.url", str(DATABASE_URL))
 
+# Full-text search objects are created by hand-written DDL (see
+# sql_app/search.py) rather than declared on the models; keep autogenerate
+# from proposing to drop them.
+SEARCH_OBJECTS = {"search_vector", "ix_Posts_search_vector", "posts_fts"}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return name not in SEARCH_OBJECTS
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -47,6 +56,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -68,7 +78,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
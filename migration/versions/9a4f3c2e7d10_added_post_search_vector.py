@@ -0,0 +1,37 @@
+"""added post search vector
+
+Revision ID: 9a4f3c2e7d10
+Revises: 5b2d8e4c1a7f
+Create Date: 2026-10-17 18:21:47.905113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4f3c2e7d10'
+down_revision: Union[str, None] = '5b2d8e4c1a7f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A stored generated column is computed for every existing row when it is
+    # added, which backfills the search vectors, and kept current on writes.
+    op.execute(
+        """
+        ALTER TABLE "Posts" ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(content, '')), 'B')
+        ) STORED
+        """
+    )
+    op.create_index('ix_Posts_search_vector', 'Posts', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_Posts_search_vector', table_name='Posts', postgresql_using='gin')
+    op.drop_column('Posts', 'search_vector')
@@ -0,0 +1,85 @@
+import json
+import logging
+from functools import lru_cache
+
+import tiktoken
+
+
+logger = logging.getLogger(__name__)
+
+TRUNCATION_MARKER = " ..."
+MIN_TRUNCATED_TOKENS = 64
+
+
+class ApproxEncoding:
+    """Stand-in for a tiktoken encoding that treats every 4 characters as a token."""
+
+    chars_per_token = 4
+
+    def encode(self, text: str, **kwargs) -> list:
+        step = self.chars_per_token
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    def decode(self, tokens: list) -> str:
+        return "".join(tokens)
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str = "gpt-4o"):
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # tiktoken downloads its BPE files on first use; without network access
+        # fall back to an estimate rather than failing every chatbot request.
+        logger.warning(f"Could not load tiktoken encoding for {model}, estimating tokens: {e}")
+        return ApproxEncoding()
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    return len(get_encoding(model).encode(text or "", disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """Cut ``text`` down to at most ``max_tokens`` tokens, marking the cut."""
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text or "", disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens]) + TRUNCATION_MARKER
+
+
+def pack_posts(posts: list, budget: int, max_post_tokens: int, model: str = "gpt-4o"):
+    """Fit posts, most relevant first, into a token budget.
+
+    Each post's ``content`` is truncated to ``max_post_tokens``. A post that
+    still does not fit is cut down to the space left, or skipped when that
+    space is too small to be useful. Returns ``(packed_posts, stats)``.
+    """
+    packed = []
+    stats = {"budget": budget, "tokens": 0, "posts": 0, "truncated": 0, "skipped": 0}
+    for post in posts:
+        remaining = budget - stats["tokens"]
+        content = truncate_tokens(post["content"], max_post_tokens, model)
+        truncated = content != post["content"]
+        candidate = dict(post, content=content)
+        cost = count_tokens(json.dumps(candidate, ensure_ascii=False), model)
+        if cost > remaining:
+            overhead = cost - count_tokens(content, model)
+            room = remaining - overhead
+            if room < MIN_TRUNCATED_TOKENS:
+                stats["skipped"] += 1
+                continue
+            candidate["content"] = truncate_tokens(content, room, model)
+            truncated = True
+            cost = count_tokens(json.dumps(candidate, ensure_ascii=False), model)
+            if cost > remaining:
+                stats["skipped"] += 1
+                continue
+        packed.append(candidate)
+        stats["tokens"] += cost
+        stats["posts"] += 1
+        stats["truncated"] += int(truncated)
+    return packed, stats
@@ -0,0 +1,238 @@
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "do", "does",
+    "for", "from", "has", "have", "how", "i", "if", "in", "is", "it", "its", "me",
+    "my", "of", "on", "or", "our", "so", "that", "the", "their", "there", "this",
+    "to", "was", "we", "what", "when", "where", "which", "who", "why", "will",
+    "with", "you", "your",
+}
+
+TITLE_WEIGHT = 2
+
+INDEX_COMPACT_INTERVAL = float(os.getenv("INDEX_COMPACT_INTERVAL", "30"))
+INDEX_COMPACT_RATIO = float(os.getenv("INDEX_COMPACT_RATIO", "0.2"))
+
+
+def tokenize(text: str) -> list:
+    """Lowercase, split on non-alphanumerics and drop stopwords."""
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """In-memory Okapi BM25 index over posts and their comments.
+
+    Documents are patched in place: every write gets a fresh internal slot and
+    the slot it replaces is tombstoned, so searches skip it until a compaction
+    drops it from the postings. ``version`` is bumped on every change and can
+    be used as the corpus version by anything caching on top of the index.
+
+    ``content_version`` is the feed ``content_version`` (see ``feed_state``)
+    the index is known to reflect: recorded by ``load`` and advanced by
+    ``mark_synced`` as this worker applies its own writes. A database value
+    past it means another worker changed posts or comments.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs = {}
+        self.slots = {}
+        self.slot_owner = {}
+        self.slot_len = {}
+        self.postings = defaultdict(dict)
+        self.tombstones = set()
+        self.total_len = 0
+        self.version = 0
+        self.content_version = 0
+        self.loaded = False
+        self._next_slot = 0
+        self._lock = threading.RLock()
+        self._compactor = None
+        self._stop = threading.Event()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _index_doc(self, doc: dict) -> None:
+        terms = tokenize(doc["title"]) * TITLE_WEIGHT + tokenize(doc["content"])
+        for comment in doc["comments"].values():
+            terms += tokenize(comment)
+        slot = self._next_slot
+        self._next_slot += 1
+        self.slots[doc["id"]] = slot
+        self.slot_owner[slot] = doc["id"]
+        self.slot_len[slot] = len(terms)
+        self.total_len += len(terms)
+        for term, tf in Counter(terms).items():
+            self.postings[term][slot] = tf
+
+    def _tombstone(self, doc_id: str) -> None:
+        slot = self.slots.pop(doc_id, None)
+        if slot is not None:
+            self.tombstones.add(slot)
+            self.total_len -= self.slot_len[slot]
+
+    def upsert(self, doc_id: str, title: str, content: str, comments: dict = None) -> None:
+        with self._lock:
+            self._tombstone(doc_id)
+            doc = {"id": doc_id, "title": title, "content": content, "comments": dict(comments or {})}
+            self.docs[doc_id] = doc
+            self._index_doc(doc)
+            self.version += 1
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            if self.docs.pop(doc_id, None) is None:
+                return
+            self._tombstone(doc_id)
+            self.version += 1
+
+    def add_comment(self, doc_id: str, comment_id: str, content: str) -> None:
+        with self._lock:
+            doc = self.docs.get(doc_id)
+            if doc is None:
+                return
+            comments = dict(doc["comments"], **{comment_id: content})
+            self.upsert(doc_id, doc["title"], doc["content"], comments)
+
+    def remove_comment(self, doc_id: str, comment_id: str) -> None:
+        with self._lock:
+            doc = self.docs.get(doc_id)
+            if doc is None or comment_id not in doc["comments"]:
+                return
+            comments = {k: v for k, v in doc["comments"].items() if k != comment_id}
+            self.upsert(doc_id, doc["title"], doc["content"], comments)
+
+    def mark_synced(self, content_version: int) -> None:
+        """Record that this worker's write at feed ``content_version`` has been applied.
+
+        Only the next version in sequence is taken; a gap means some other
+        worker's write is missing, and ``is_current`` keeps reporting it.
+        """
+        with self._lock:
+            if self.loaded and content_version == self.content_version + 1:
+                self.content_version = content_version
+
+    def is_current(self, content_version: int) -> bool:
+        return self.loaded and self.content_version >= content_version
+
+    def get(self, doc_id: str):
+        return self.docs.get(doc_id)
+
+    def search(self, query: str, k: int = 10) -> list:
+        """Return up to ``k`` ``(doc_id, score)`` pairs, best match first."""
+        with self._lock:
+            n_docs = len(self.docs)
+            if not n_docs:
+                return []
+            avg_len = max(self.total_len / n_docs, 1)
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                live = [(slot, tf) for slot, tf in postings.items() if slot not in self.tombstones]
+                if not live:
+                    continue
+                idf = math.log(1 + (n_docs - len(live) + 0.5) / (len(live) + 0.5))
+                for slot, tf in live:
+                    norm = self.k1 * (1 - self.b + self.b * self.slot_len[slot] / avg_len)
+                    scores[self.slot_owner[slot]] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def compact(self) -> int:
+        """Drop tombstoned slots from the postings; returns how many were dropped."""
+        with self._lock:
+            dead = self.tombstones
+            if not dead:
+                return 0
+            for term in list(self.postings):
+                postings = self.postings[term]
+                for slot in dead.intersection(postings):
+                    del postings[slot]
+                if not postings:
+                    del self.postings[term]
+            for slot in dead:
+                self.slot_len.pop(slot, None)
+                self.slot_owner.pop(slot, None)
+            self.tombstones = set()
+            return len(dead)
+
+    def needs_compaction(self) -> bool:
+        return len(self.tombstones) > INDEX_COMPACT_RATIO * max(len(self.docs), 1)
+
+    def load(self, db) -> None:
+        """Replace the index contents with every post and comment in ``db``.
+
+        The lock is held while reading, so a write applied by this worker
+        meanwhile is either in the rows read or applied after the rebuild.
+        """
+        from sql_app.conditional import feed_state
+        from sql_app.models import Comment, Post
+
+        with self._lock:
+            # Read before the rows: anything committed in between is picked
+            # up again by the next ``is_current`` check.
+            content_version = feed_state(db)[1]
+            posts = db.query(Post.id, Post.title, Post.content).all()
+            comments = defaultdict(dict)
+            for comment_id, post_id, content in db.query(Comment.id, Comment.post_id, Comment.content):
+                comments[post_id][comment_id] = content
+
+            self.docs.clear()
+            self.slots.clear()
+            self.slot_owner.clear()
+            self.slot_len.clear()
+            self.postings.clear()
+            self.tombstones = set()
+            self.total_len = 0
+            for post_id, title, content in posts:
+                self.upsert(post_id, title, content, comments.get(post_id))
+            self.content_version = content_version
+            self.loaded = True
+        logger.info(
+            f"Search index loaded with {len(posts)} posts (version {self.version}, "
+            f"content version {content_version})."
+        )
+
+    def start_compactor(self, interval: float = INDEX_COMPACT_INTERVAL) -> None:
+        """Compact tombstones from a daemon thread every ``interval`` seconds."""
+        if self._compactor is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                if self.needs_compaction():
+                    dropped = self.compact()
+                    logger.info(f"Search index compacted {dropped} tombstones.")
+
+        self._stop.clear()
+        self._compactor = threading.Thread(target=run, name="index-compactor", daemon=True)
+        self._compactor.start()
+
+    def stop_compactor(self) -> None:
+        self._stop.set()
+        self._compactor = None
+
+    @classmethod
+    def from_rows(cls, rows) -> "BM25Index":
+        """Build an index from ``(id, title, content)`` rows."""
+        index = cls()
+        for doc_id, title, content in rows:
+            index.upsert(doc_id, title, content)
+        index.loaded = True
+        return index
+
+
+post_index = BM25Index()
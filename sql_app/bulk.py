@@ -0,0 +1,207 @@
+import logging
+import os
+import uuid
+from datetime import datetime
+
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+from .conditional import bump_feed
+from .models import Comment, Post
+from .schemas import BulkPostIn
+from .search import apply_search
+
+logger = logging.getLogger(__name__)
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+
+
+def build_rows(post: BulkPostIn, now: datetime) -> tuple:
+    """Return ``(post_row, comment_rows)`` with ids assigned up front.
+
+    A post with a client-supplied id gets comment ids derived from it, so a
+    resent post maps to exactly the same rows.
+    """
+    post_id = post.id or str(uuid.uuid4())
+    namespace = uuid.uuid5(uuid.NAMESPACE_URL, f"post:{post_id}") if post.id else None
+    post_row = {
+        "id": post_id,
+        "title": post.title,
+        "content": post.content,
+        "upvotes": 0,
+        "author": post.author,
+        "category": post.category,
+        "created_at": now,
+        "updated_at": now,
+        "version": 1,
+    }
+    comment_rows = [
+        {
+            "id": str(uuid.uuid5(namespace, str(number)) if namespace else uuid.uuid4()),
+            "content": comment.content,
+            "upvotes": 0,
+            "author": comment.author,
+            "created_at": now,
+            "post_id": post_id,
+        }
+        for number, comment in enumerate(post.comments)
+    ]
+    return post_row, comment_rows
+
+
+# Dialects whose INSERT can skip rows that already exist.
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _insert_statement(db, table):
+    dialect_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is None:
+        return insert(table)
+    return dialect_insert(table).on_conflict_do_nothing(index_elements=["id"])
+
+
+def _insert(db, items: list) -> tuple:
+    """Insert ``items`` and return ``(new post ids, feed content_version)``.
+
+    The version is ``None`` when nothing was new, since the feed is not
+    bumped then.
+
+    Posts that already exist (a retried or resumed upload) are left as they
+    are, and so are their comments. On other dialects a duplicate id fails
+    the insert instead.
+    """
+    posts = [post_row for _, post_row, _ in items]
+    table = Post.__table__
+    if db.get_bind().dialect.name in _UPSERT_INSERTS:
+        new_ids = set(db.execute(_insert_statement(db, table).returning(table.c.id), posts).scalars())
+    else:
+        db.execute(insert(table), posts)
+        new_ids = {post_row["id"] for post_row in posts}
+    comments = [
+        row for _, post_row, comment_rows in items if post_row["id"] in new_ids for row in comment_rows
+    ]
+    if comments:
+        db.execute(_insert_statement(db, Comment.__table__), comments)
+    content_version = bump_feed(db, content=True) if new_ids else None
+    return new_ids, content_version
+
+
+def insert_posts(db, payload: list, chunk_size: int = BULK_CHUNK_SIZE) -> tuple:
+    """Insert posts with their nested comments in chunked transactions.
+
+    Each chunk is two executemany ``INSERT`` statements (posts, then
+    comments) committed together. If a chunk fails, its items are retried one
+    per transaction so a single bad item only fails itself.
+
+    Items may carry their own ``id``. An item whose post already exists is
+    skipped and reported as ``existing``, so resending a batch after a lost
+    response inserts nothing twice.
+
+    Returns ``(results, inserted, content_versions)``. ``results`` has one
+    entry per payload item with its ``id`` and ``comment_ids`` or an
+    ``error``. ``inserted`` lists ``(post_row, comment_rows)`` for every newly
+    committed post, and ``content_versions`` the feed version each committed
+    transaction bumped to, in order.
+    """
+    now = datetime.utcnow()
+    results = []
+    valid = []
+    seen_ids = set()
+    for index, raw in enumerate(payload):
+        try:
+            post = BulkPostIn.model_validate(raw)
+        except ValidationError as e:
+            results.append({"index": index, "id": None, "comment_ids": [], "existing": False, "error": str(e)})
+            continue
+        post_row, comment_rows = build_rows(post, now)
+        # Only the first item with a given id is inserted; repeats in the
+        # same request refer to that post.
+        if post_row["id"] in seen_ids:
+            results.append({"index": index, "id": post_row["id"], "comment_ids": [], "existing": True, "error": None})
+            continue
+        seen_ids.add(post_row["id"])
+        results.append({"index": index, "id": None, "comment_ids": [], "existing": False, "error": None})
+        valid.append((index, post_row, comment_rows))
+
+    inserted = []
+    content_versions = []
+
+    def committed(items, new_ids, content_version):
+        if content_version is not None:
+            content_versions.append(content_version)
+        for index, post_row, comment_rows in items:
+            results[index]["id"] = post_row["id"]
+            if post_row["id"] not in new_ids:
+                results[index]["existing"] = True
+                continue
+            results[index]["comment_ids"] = [row["id"] for row in comment_rows]
+            inserted.append((post_row, comment_rows))
+
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        try:
+            new_ids, content_version = _insert(db, chunk)
+            db.commit()
+            committed(chunk, new_ids, content_version)
+            continue
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"Bulk chunk at item {chunk[0][0]} failed, retrying items one by one: {e}")
+
+        for item in chunk:
+            try:
+                new_ids, content_version = _insert(db, [item])
+                db.commit()
+                committed([item], new_ids, content_version)
+            except SQLAlchemyError as e:
+                db.rollback()
+                results[item[0]]["error"] = f"Database error: {e.orig if hasattr(e, 'orig') else e}"
+
+    return results, inserted, content_versions
+
+
+def matching_post_ids(db, ids=None, search=None, category=None, author=None, created_before=None) -> list:
+    """Ids of posts matching every given criterion."""
+    query = db.query(Post.id)
+    if ids is not None:
+        query = query.filter(Post.id.in_(ids))
+    if category is not None:
+        query = query.filter(Post.category == category)
+    if author is not None:
+        query = query.filter(Post.author == author)
+    if created_before is not None:
+        query = query.filter(Post.created_at < created_before)
+    if search is not None:
+        query, _ = apply_search(query, search)
+    return [post_id for post_id, in query]
+
+
+def delete_posts(db, post_ids: list, chunk_size: int = BULK_CHUNK_SIZE) -> dict:
+    """Delete posts in set-based statements, ``chunk_size`` ids at a time.
+
+    Comments go with them through ``ON DELETE CASCADE``. Everything is
+    committed as one transaction. Returns ``(deleted, content_version)``:
+    a map of each deleted post id to the ids of its comments, for cache and
+    index invalidation, and the feed version bumped to (``None`` if nothing
+    was deleted).
+    """
+    deleted = {}
+    for start in range(0, len(post_ids), chunk_size):
+        chunk = post_ids[start:start + chunk_size]
+        comments = db.execute(
+            select(Comment.id, Comment.post_id).where(Comment.post_id.in_(chunk))
+        ).all()
+        removed = db.execute(
+            delete(Post.__table__).where(Post.__table__.c.id.in_(chunk)).returning(Post.__table__.c.id)
+        ).scalars()
+        for post_id in removed:
+            deleted[post_id] = []
+        for comment_id, post_id in comments:
+            if post_id in deleted:
+                deleted[post_id].append(comment_id)
+    content_version = bump_feed(db, content=True) if deleted else None
+    db.commit()
+    return deleted, content_version
@@ -0,0 +1,90 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Response, status
+from sqlalchemy import select, update
+
+from .models import FeedVersion, Post
+
+
+def feed_state(db) -> tuple:
+    """``(version, content_version)`` from the shared ``FeedVersion`` row; one primary-key read."""
+    row = db.execute(
+        select(FeedVersion.version, FeedVersion.content_version).where(FeedVersion.id == 1)
+    ).first()
+    return tuple(row) if row is not None else (0, 0)
+
+
+def bump_feed(db, content: bool = False):
+    """Bump the feed version (and ``content_version`` too if ``content``) in the caller's transaction.
+
+    Returns the new ``content_version``.
+    """
+    values = {"version": FeedVersion.version + 1}
+    if content:
+        values["content_version"] = FeedVersion.content_version + 1
+    return db.execute(
+        update(FeedVersion).where(FeedVersion.id == 1).values(**values).returning(FeedVersion.content_version)
+    ).scalar()
+
+
+def touch_post(db, post_id: str, content: bool = False):
+    """Bump a post's version and modification time, and the feed, inside the caller's transaction.
+
+    ``content`` marks a change to the post's comments. Returns the new feed
+    ``content_version``.
+    """
+    db.execute(
+        update(Post)
+        .where(Post.id == post_id)
+        .values(version=Post.version + 1, updated_at=datetime.utcnow())
+    )
+    return bump_feed(db, content)
+
+
+def post_etag(post_id: str, version: int) -> str:
+    return f'"{post_id}-{version}"'
+
+
+def list_etag(version: int, *params) -> str:
+    """ETag of a listing at feed ``version`` (see ``feed_state``) for the given request parameters."""
+    key = ":".join(str(param) for param in (version,) + params)
+    return f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def is_not_modified(request, etag: str, last_modified: datetime = None) -> bool:
+    """Evaluate ``If-None-Match`` (preferred) or ``If-Modified-Since``."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        # HTTP dates have whole-second precision.
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def validator_headers(etag: str, last_modified: datetime = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified(etag: str, last_modified: datetime = None) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag, last_modified))
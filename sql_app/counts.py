@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import func, text
+
+from .models import Post
+from .search import apply_search
+
+
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", "60"))
+COUNT_CACHE_MAX_KEYS = int(os.getenv("COUNT_CACHE_MAX_KEYS", "1024"))
+COUNT_ESTIMATE_THRESHOLD = int(os.getenv("COUNT_ESTIMATE_THRESHOLD", "100000"))
+
+
+class PostCounter:
+    """Filter-aware post totals, cached per filter until the next post write.
+
+    Callers pass the feed's ``content_version`` (see ``feed_state``), which
+    every worker's post and comment writes bump, so cached totals are dropped
+    as soon as the version moves, whichever worker took the write.
+    Unfiltered totals on a large Postgres table come from the planner's
+    ``reltuples`` statistic instead of a full scan and are flagged as
+    estimates.
+    """
+
+    def __init__(self, ttl: float = COUNT_CACHE_TTL, max_keys: int = COUNT_CACHE_MAX_KEYS,
+                 estimate_threshold: int = COUNT_ESTIMATE_THRESHOLD):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.estimate_threshold = estimate_threshold
+        self.generation = 0
+        self.version = None
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _invalidate(self, version: int) -> None:
+        self.version = version
+        self.generation += 1
+        self._counts.clear()
+
+    def _estimate(self, db):
+        if db.get_bind().dialect.name != "postgresql":
+            return None
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = '\"Posts\"'::regclass")
+        ).scalar()
+        if estimate is None or estimate < self.estimate_threshold:
+            return None
+        return int(estimate)
+
+    def _exact(self, db, search: str) -> int:
+        query = db.query(func.count(Post.id)).select_from(Post)
+        if search:
+            query, _ = apply_search(query, search)
+        return query.scalar()
+
+    def count(self, db, version: int, search: str = "") -> tuple:
+        """Return ``(total, is_estimate)`` for posts matching ``search`` at content ``version``."""
+        key = search.strip()
+        with self._lock:
+            if self.version is None or version > self.version:
+                self._invalidate(version)
+            cached = self._counts.get(key)
+            if cached and cached[2] > time.time():
+                return cached[0], cached[1]
+            generation = self.generation
+
+        total = None if key else self._estimate(db)
+        is_estimate = total is not None
+        if total is None:
+            total = self._exact(db, key)
+
+        with self._lock:
+            if generation == self.generation:
+                self._counts[key] = (total, is_estimate, time.time() + self.ttl)
+                self._counts.move_to_end(key)
+                while len(self._counts) > self.max_keys:
+                    self._counts.popitem(last=False)
+        return total, is_estimate
+
+
+post_counter = PostCounter()
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Index, DDL, event
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -15,8 +15,22 @@ class Post(Base):
     author = Column(String, default="Anonymous")
     category = Column(String, default="Carrier Comparison")
     created_at = Column(DateTime, default=datetime.utcnow())
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    version = Column(Integer, default=1, server_default="1", nullable=False)
 
-    comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan", lazy='joined')
+    # Comments are removed by the database's ON DELETE CASCADE, so deleting a
+    # post never loads its comments.
+    comments = relationship(
+        "Comment", back_populates="post", cascade="all, delete-orphan", lazy='select', passive_deletes=True
+    )
+
+    # Composite indexes backing keyset pagination for each sort_by option.
+    __table_args__ = (
+        Index("ix_Posts_created_at_id", "created_at", "id"),
+        Index("ix_Posts_upvotes_id", "upvotes", "id"),
+        Index("ix_Posts_title_id", "title", "id"),
+        Index("ix_Posts_category_id", "category", "id"),
+    )
 
 class Comment(Base):
     __tablename__ = "Comments"
@@ -27,5 +41,30 @@ class Comment(Base):
     author = Column(String, default="Anonymous")
     created_at = Column(DateTime, default=datetime.utcnow())
 
-    post_id = Column(String, ForeignKey("Posts.id"))
-    post = relationship("Post", back_populates="comments")
\ No newline at end of file
+    post_id = Column(String, ForeignKey("Posts.id", ondelete="CASCADE"))
+    post = relationship("Post", back_populates="comments")
+
+    __table_args__ = (
+        Index("ix_Comments_post_id_upvotes", "post_id", "upvotes"),
+    )
+
+
+class FeedVersion(Base):
+    """One-row counters bumped in the same transaction as the writes they track.
+
+    ``version`` moves on every write that can change a post listing: posts or
+    comments added or removed, and likes. ``content_version`` only moves when
+    posts or comments are added or removed. Every worker reads the same row.
+    """
+    __tablename__ = "FeedVersion"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    content_version = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+
+event.listen(
+    FeedVersion.__table__,
+    "after_create",
+    DDL('INSERT INTO "FeedVersion" (id, version, content_version) VALUES (1, 0, 0)'),
+)
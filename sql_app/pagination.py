@@ -0,0 +1,97 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_, tuple_
+
+from .models import Post
+
+
+# sort_by -> (column, descending)
+SORT_COLUMNS = {
+    "created_at": (Post.created_at, True),
+    "upvotes": (Post.upvotes, True),
+    "title": (Post.title, False),
+    "category": (Post.category, False),
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def order_posts(query, sort_by: str):
+    """Order by the sort column with ``Post.id`` as a tie-breaker.
+
+    Both columns go the same direction so the ``(column, id)`` indexes can be
+    scanned forwards or backwards.
+    """
+    column, descending = SORT_COLUMNS[sort_by]
+    if descending:
+        return query.order_by(column.desc(), Post.id.desc())
+    return query.order_by(column.asc(), Post.id.asc())
+
+
+def nulls_sort_last(query, descending: bool) -> bool:
+    # Postgres sorts NULL above every value, SQLite and MySQL below.
+    nulls_largest = query.session.get_bind().dialect.name not in ("sqlite", "mysql")
+    return nulls_largest != descending
+
+
+def encode_cursor(sort_by: str, post: Post) -> str:
+    column, _ = SORT_COLUMNS[sort_by]
+    value = getattr(post, column.key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort_by, value, post.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Return ``(sort_by, value, post_id)`` from an opaque cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_by, value, post_id = json.loads(raw)
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(sort_by)
+        if sort_by == "created_at" and value is not None:
+            value = datetime.fromisoformat(value)
+        return sort_by, value, post_id
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def seek(query, sort_by: str, value, post_id: str):
+    """Keep only rows that sort after ``(value, post_id)`` in ``order_posts`` order."""
+    column, descending = SORT_COLUMNS[sort_by]
+    nulls_last = nulls_sort_last(query, descending)
+    after_id = Post.id < post_id if descending else Post.id > post_id
+    if value is None:
+        condition = and_(column.is_(None), after_id)
+        if not nulls_last:
+            condition = or_(condition, column.isnot(None))
+        return query.filter(condition)
+    key = tuple_(column, Post.id)
+    condition = key < tuple_(value, post_id) if descending else key > tuple_(value, post_id)
+    if nulls_last:
+        condition = or_(condition, column.is_(None))
+    return query.filter(condition)
+
+
+def paginate(query, sort_by: str, limit: int, offset: int = 0, cursor: str = None) -> tuple:
+    """Fetch one page; returns ``(rows, next_cursor)``.
+
+    With a ``cursor`` the page starts right after the row it encodes, so deep
+    pages cost the same as the first one. Without it ``offset`` is used.
+    """
+    if cursor:
+        cursor_sort, value, post_id = decode_cursor(cursor)
+        if cursor_sort != sort_by:
+            raise InvalidCursor(f"Cursor was issued for sort_by={cursor_sort}, not {sort_by}.")
+        query = order_posts(seek(query, sort_by, value, post_id), sort_by)
+    else:
+        query = order_posts(query, sort_by).offset(offset)
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(sort_by, rows[limit - 1]) if len(rows) > limit and limit > 0 else None
+    return rows[:limit], next_cursor
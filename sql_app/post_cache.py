@@ -0,0 +1,134 @@
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy.orm import joinedload
+
+from cache import make_cache
+from .models import Comment, Post
+from .schemas import CommentOut, PostDetail
+
+
+POST_CACHE_BACKEND = os.getenv("POST_CACHE_BACKEND", "memory")
+POST_CACHE_PATH = os.getenv("POST_CACHE_PATH", "./data/post_cache.sqlite3")
+POST_CACHE_TTL = float(os.getenv("POST_CACHE_TTL", "300"))
+POST_CACHE_MAX_ENTRIES = int(os.getenv("POST_CACHE_MAX_ENTRIES", "10000"))
+POST_CACHE_MAX_BYTES = int(os.getenv("POST_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Key of a tombstone entry, holding the time its post or comment was invalidated.
+TOMBSTONE = "invalidated_at"
+
+
+class PostCache:
+    """Read-through cache of serialized posts (with their comments) and comments.
+
+    Entries hold the JSON-ready response body plus the post's version and
+    modification time, so conditional GETs on a hot post never reach the
+    database. Writers call ``invalidate`` after committing, which replaces the
+    entries with timestamped tombstones. A load only stores its result if no
+    tombstone newer than the load's start and no newer post version is there,
+    checked atomically in the backend, so a load that raced a write can't put
+    a stale copy back. With the ``sqlite`` backend all workers on a host
+    share the entries, tombstones included, so this holds across workers.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.tombstones_read = 0
+
+    @staticmethod
+    def post_key(post_id: str) -> str:
+        return f"post:{post_id}"
+
+    @staticmethod
+    def comment_key(comment_id: str) -> str:
+        return f"comment:{comment_id}"
+
+    @staticmethod
+    def _supersedes(current: dict, entry: dict, started: float) -> bool:
+        """Whether a stored value is newer than ``entry``, loaded from ``started`` on."""
+        if TOMBSTONE in current:
+            return current[TOMBSTONE] >= started
+        return current.get("version", 0) > entry.get("version", 0)
+
+    def _fill(self, key: str, load):
+        started = time.time()
+        entry = load()
+        if entry is not None:
+            self.backend.set_unless(key, entry, lambda current: self._supersedes(current, entry, started))
+        return entry
+
+    def _lookup(self, key: str):
+        entry = self.backend.get(key)
+        if entry is not None and TOMBSTONE in entry:
+            self.tombstones_read += 1
+            return None
+        return entry
+
+    def get_post(self, db, post_id: str):
+        """Return ``{"version", "updated_at", "body"}`` for a post, or None if missing."""
+        key = self.post_key(post_id)
+        entry = self._lookup(key)
+        if entry is None:
+            entry = self._fill(key, lambda: self._load_post(db, post_id))
+        if entry is not None:
+            entry["updated_at"] = datetime.fromisoformat(entry["updated_at"])
+        return entry
+
+    def get_comment(self, db, comment_id: str):
+        """Return a comment's response body, or None if missing."""
+        key = self.comment_key(comment_id)
+        body = self._lookup(key)
+        if body is None:
+            body = self._fill(key, lambda: self._load_comment(db, comment_id))
+        return body
+
+    @staticmethod
+    def _load_post(db, post_id: str):
+        post = (
+            db.query(Post)
+            .options(joinedload(Post.comments))
+            .filter(Post.id == post_id)
+            .first()
+        )
+        if post is None:
+            return None
+        return {
+            "version": post.version,
+            "updated_at": (post.updated_at or post.created_at).isoformat(),
+            "body": PostDetail.model_validate(post).model_dump(mode="json"),
+        }
+
+    @staticmethod
+    def _load_comment(db, comment_id: str):
+        comment = db.query(Comment).filter(Comment.id == comment_id).first()
+        if comment is None:
+            return None
+        return CommentOut.model_validate(comment).model_dump(mode="json")
+
+    def invalidate(self, post_id: str = None, comment_ids=()) -> None:
+        """Tombstone a post's entry and the entries of ``comment_ids``; call after commit."""
+        tombstone = {TOMBSTONE: time.time()}
+        if post_id is not None:
+            self.backend.set(self.post_key(post_id), tombstone)
+        for comment_id in comment_ids:
+            self.backend.set(self.comment_key(comment_id), tombstone)
+
+    def stats(self) -> dict:
+        # The backend counts a tombstone read as a hit; report it as a miss.
+        stats = self.backend.stats()
+        hits = stats["hits"] - self.tombstones_read
+        misses = stats["misses"] + self.tombstones_read
+        lookups = hits + misses
+        return dict(stats, hits=hits, misses=misses, hit_rate=round(hits / lookups, 4) if lookups else 0.0)
+
+
+post_cache = PostCache(
+    make_cache(
+        POST_CACHE_BACKEND,
+        path=POST_CACHE_PATH,
+        ttl=POST_CACHE_TTL,
+        max_entries=POST_CACHE_MAX_ENTRIES,
+        max_bytes=POST_CACHE_MAX_BYTES,
+    )
+)
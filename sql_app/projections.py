@@ -0,0 +1,77 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+
+from .models import Comment, Post
+
+
+SUMMARY_COLUMNS = (
+    Post.id,
+    Post.title,
+    Post.content,
+    Post.upvotes,
+    Post.author,
+    Post.category,
+    Post.created_at,
+)
+
+
+def list_query(db, view: str = "summary"):
+    """Base query for listing endpoints.
+
+    ``summary`` selects only post columns, without loading any comments.
+    ``full`` loads whole posts with their comment threads in one extra
+    ``IN`` query instead of a join.
+    """
+    if view == "full":
+        return db.query(Post).options(selectinload(Post.comments))
+    return db.query(*SUMMARY_COLUMNS)
+
+
+def comment_summaries(db, post_ids=None) -> dict:
+    """Map post id to its comment count and most upvoted comment.
+
+    Runs one windowed query over the comments of ``post_ids`` (or all posts
+    when None), so the post rows themselves are never multiplied.
+    """
+    ranked = select(
+        Comment.id,
+        Comment.post_id,
+        Comment.content,
+        Comment.author,
+        Comment.upvotes,
+        Comment.created_at,
+        func.count().over(partition_by=Comment.post_id).label("comment_count"),
+        func.row_number()
+        .over(partition_by=Comment.post_id, order_by=(Comment.upvotes.desc(), Comment.created_at))
+        .label("position"),
+    )
+    if post_ids is not None:
+        if not post_ids:
+            return {}
+        ranked = ranked.where(Comment.post_id.in_(post_ids))
+    ranked = ranked.subquery()
+
+    summaries = {}
+    for row in db.execute(select(ranked).where(ranked.c.position == 1)):
+        summaries[row.post_id] = {
+            "comment_count": row.comment_count,
+            "top_comment": {
+                "id": row.id,
+                "content": row.content,
+                "author": row.author,
+                "upvotes": row.upvotes,
+                "created_at": row.created_at,
+            },
+        }
+    return summaries
+
+
+def summarize(db, rows, all_posts: bool = False) -> list:
+    """Turn summary rows into dicts carrying ``comment_count`` and ``top_comment``."""
+    summaries = comment_summaries(db, None if all_posts else [row.id for row in rows])
+    posts = []
+    for row in rows:
+        post = dict(row._mapping)
+        post.update(summaries.get(row.id, {"comment_count": 0, "top_comment": None}))
+        posts.append(post)
+    return posts
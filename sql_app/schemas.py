@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Union
 
 class CommentBase(BaseModel):
     content: str
@@ -24,3 +24,100 @@ class PostBase(BaseModel):
 
 class QuestionBase(BaseModel):
     question: str
+
+
+class CommentOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    content: Optional[str] = None
+    upvotes: Optional[int] = 0
+    author: Optional[str] = None
+    created_at: Optional[datetime] = None
+    post_id: Optional[str] = None
+
+
+class PostOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    title: Optional[str] = None
+    content: Optional[str] = None
+    upvotes: Optional[int] = 0
+    author: Optional[str] = None
+    category: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class PostDetail(PostOut):
+    comments: List[CommentOut] = []
+
+
+class TopComment(BaseModel):
+    id: str
+    content: Optional[str] = None
+    author: Optional[str] = None
+    upvotes: Optional[int] = 0
+    created_at: Optional[datetime] = None
+
+
+class PostSummary(PostOut):
+    comment_count: int = 0
+    top_comment: Optional[TopComment] = None
+
+
+class PostPage(BaseModel):
+    posts: List[Union[PostSummary, PostDetail]]
+    total_posts: int
+    total_is_estimate: bool = False
+    limit: int
+    offset: int
+    next_cursor: Optional[str] = None
+
+
+class AllPosts(BaseModel):
+    posts: List[Union[PostSummary, PostDetail]]
+    total_posts: int
+
+
+class MessageOut(BaseModel):
+    message: str
+
+
+class LikeOut(MessageOut):
+    upvotes: Optional[int] = None
+
+
+class BulkPostIn(PostBase):
+    # Client-chosen id; resending an item with the same id is a no-op.
+    id: Optional[str] = None
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    comment_ids: List[str] = []
+    existing: bool = False
+    error: Optional[str] = None
+
+
+class BulkUploadOut(BaseModel):
+    created: int
+    existing: int = 0
+    failed: int
+    results: List[BulkItemResult]
+
+
+class BulkDeleteIn(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    ids: Optional[List[str]] = None
+    search: Optional[str] = None
+    category: Optional[str] = None
+    author: Optional[str] = None
+    created_before: Optional[datetime] = None
+
+
+class BulkDeleteOut(BaseModel):
+    deleted: int
+    ids: List[str]
@@ -0,0 +1,74 @@
+import re
+
+from sqlalchemy import DDL, Float, Integer, event, false, func, literal_column, or_, text
+
+from .models import Post
+
+
+# Postgres keeps a weighted tsvector of title (A) and content (B) in a
+# generated column; SQLite mirrors the same fields into an FTS5 table so
+# search can be exercised locally.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+)
+
+POSTGRES_DDL = [
+    f'ALTER TABLE "Posts" ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED',
+    'CREATE INDEX "ix_Posts_search_vector" ON "Posts" USING GIN (search_vector)',
+]
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE posts_fts USING fts5("
+    "title, content, content='Posts', content_rowid='rowid', tokenize='porter unicode61')",
+    'CREATE TRIGGER posts_fts_ai AFTER INSERT ON "Posts" BEGIN '
+    "INSERT INTO posts_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content); END",
+    'CREATE TRIGGER posts_fts_ad AFTER DELETE ON "Posts" BEGIN '
+    "INSERT INTO posts_fts(posts_fts, rowid, title, content) "
+    "VALUES ('delete', old.rowid, old.title, old.content); END",
+    'CREATE TRIGGER posts_fts_au AFTER UPDATE OF title, content ON "Posts" BEGIN '
+    "INSERT INTO posts_fts(posts_fts, rowid, title, content) "
+    "VALUES ('delete', old.rowid, old.title, old.content); "
+    "INSERT INTO posts_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content); END",
+]
+
+for statement in POSTGRES_DDL:
+    event.listen(Post.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_DDL:
+    event.listen(Post.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+
+def fts5_query(search: str) -> str:
+    """Quote each word so user input can't inject FTS5 query syntax."""
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", search))
+
+
+def apply_search(query, search: str):
+    """Filter ``query`` to posts matching ``search``.
+
+    Returns ``(query, rank)`` where ordering by ``rank`` ascending puts the
+    most relevant posts first. A search without any words matches nothing.
+    """
+    dialect = query.session.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        vector = literal_column('"Posts".search_vector')
+        tsquery = func.websearch_to_tsquery("english", search)
+        rank = -func.ts_rank_cd(vector, tsquery)
+        return query.filter(vector.op("@@")(tsquery)), rank
+
+    if dialect == "sqlite":
+        terms = fts5_query(search)
+        if not terms:
+            return query.filter(false()), literal_column("0")
+        matches = (
+            text("SELECT rowid AS fts_rowid, bm25(posts_fts, 2.0, 1.0) AS fts_rank FROM posts_fts WHERE posts_fts MATCH :terms")
+            .bindparams(terms=terms)
+            .columns(fts_rowid=Integer, fts_rank=Float)
+            .subquery("matches")
+        )
+        query = query.join(matches, matches.c.fts_rowid == literal_column('"Posts".rowid'))
+        return query, matches.c.fts_rank
+
+    pattern = f"%{search}%"
+    return query.filter(or_(Post.title.ilike(pattern), Post.content.ilike(pattern))), literal_column("0")
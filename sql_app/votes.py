@@ -0,0 +1,165 @@
+import logging
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import bindparam, select, update
+
+from .conditional import bump_feed
+from .database import SessionLocal
+from .models import Comment, Post
+from .post_cache import post_cache
+
+logger = logging.getLogger(__name__)
+
+VOTE_WRITE_BEHIND = os.getenv("VOTE_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+VOTE_FLUSH_INTERVAL = float(os.getenv("VOTE_FLUSH_INTERVAL", "1.0"))
+
+
+def like_post(db, post_id: str):
+    """Add one upvote in a single ``UPDATE ... RETURNING``; None if the post is missing.
+
+    The same statement bumps the post's version, so no extra touch is needed;
+    the feed version is bumped alongside when the post exists.
+    """
+    upvotes = db.execute(
+        update(Post)
+        .where(Post.id == post_id)
+        .values(upvotes=Post.upvotes + 1, version=Post.version + 1, updated_at=datetime.utcnow())
+        .returning(Post.upvotes)
+    ).scalar()
+    if upvotes is not None:
+        bump_feed(db)
+    return upvotes
+
+
+def like_comment(db, post_id: str, comment_id: str):
+    """Add one upvote to a comment of ``post_id``; None if there is no such comment."""
+    return db.execute(
+        update(Comment)
+        .where(Comment.id == comment_id, Comment.post_id == post_id)
+        .values(upvotes=Comment.upvotes + 1)
+        .returning(Comment.upvotes)
+    ).scalar()
+
+
+class VoteAggregator:
+    """Write-behind buffer for upvotes.
+
+    Likes are counted in memory per post and per comment and applied by a
+    daemon thread every ``interval`` seconds as one batched ``UPDATE`` per
+    table, so a viral post takes one row lock per flush instead of one per
+    like. Counts returned to clients are the stored value plus the pending
+    increments; a like buffered by a worker is lost if that worker dies
+    before its next flush.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.flushes = 0
+        self._posts = Counter()
+        self._comments = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        self._stop = threading.Event()
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(self._posts.values()) + sum(self._comments.values())
+
+    def like_post(self, db, post_id: str):
+        stored = db.execute(select(Post.upvotes).where(Post.id == post_id)).first()
+        if stored is None:
+            return None
+        with self._lock:
+            self._posts[post_id] += 1
+            return (stored.upvotes or 0) + self._posts[post_id]
+
+    def like_comment(self, db, post_id: str, comment_id: str):
+        stored = db.execute(
+            select(Comment.upvotes).where(Comment.id == comment_id, Comment.post_id == post_id)
+        ).first()
+        if stored is None:
+            return None
+        with self._lock:
+            self._comments[(post_id, comment_id)] += 1
+            return (stored.upvotes or 0) + self._comments[(post_id, comment_id)]
+
+    def flush(self) -> int:
+        """Apply all buffered likes; returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                posts, self._posts = self._posts, Counter()
+                comments, self._comments = self._comments, Counter()
+            if not posts and not comments:
+                return 0
+
+            touched = set(posts) | {post_id for post_id, _ in comments}
+            now = datetime.utcnow()
+            db = self.session_factory()
+            try:
+                if comments:
+                    db.execute(
+                        update(Comment.__table__)
+                        .where(Comment.__table__.c.id == bindparam("comment_id"))
+                        .values(upvotes=Comment.__table__.c.upvotes + bindparam("delta")),
+                        [
+                            {"comment_id": comment_id, "delta": delta}
+                            for (_, comment_id), delta in sorted(comments.items())
+                        ],
+                    )
+                db.execute(
+                    update(Post.__table__)
+                    .where(Post.__table__.c.id == bindparam("post_id"))
+                    .values(
+                        upvotes=Post.__table__.c.upvotes + bindparam("delta"),
+                        version=Post.__table__.c.version + 1,
+                        updated_at=now,
+                    ),
+                    # Sorted so concurrent flushes from other workers lock rows in the same order.
+                    [{"post_id": post_id, "delta": posts.get(post_id, 0)} for post_id in sorted(touched)],
+                )
+                bump_feed(db)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                with self._lock:
+                    self._posts.update(posts)
+                    self._comments.update(comments)
+                logger.error(f"Vote flush failed, keeping {len(touched)} posts buffered: {e}")
+                return 0
+            finally:
+                db.close()
+
+            for post_id in touched:
+                post_cache.invalidate(
+                    post_id, [comment_id for pid, comment_id in comments if pid == post_id]
+                )
+            self.flushes += 1
+            return sum(posts.values()) + sum(comments.values())
+
+    def start(self, interval: float = VOTE_FLUSH_INTERVAL) -> None:
+        """Flush from a daemon thread every ``interval`` seconds."""
+        if self._flusher is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                self.flush()
+
+        self._stop.clear()
+        self._flusher = threading.Thread(target=run, name="vote-flusher", daemon=True)
+        self._flusher.start()
+
+    def stop(self) -> None:
+        """Stop the flusher and write whatever is still buffered."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+
+vote_aggregator = VoteAggregator() if VOTE_WRITE_BEHIND else None